@@ -0,0 +1,97 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures the time to fill a dataset table model with rows, appending one row at
+a time and appending one document of rows at a time, as MainWindow does. The old
+way of concatenating a one-row dataframe onto the table per row is measured as
+well, unless it is skipped or there are too many rows.
+
+Usage: dataset_append.py [options]
+
+Options:
+    -h --help                Show this help screen.
+    --rows=<n>               Comma separated numbers of rows [default: 100000,1000000].
+    --rows-per-document=<n>  Number of rows appended at a time [default: 50].
+    --concat-max-rows=<n>    Skip concatenation above this many rows [default: 100000].
+"""
+
+import sys
+import time
+
+import pandas as pd
+from docopt import docopt
+
+from benkpress.datamodel import DataframeTableModel
+
+
+def make_rows(count: int) -> list[DataframeTableModel.RowConfig]:
+    return [
+        DataframeTableModel.RowConfig(
+            f"{i // 50:032x}", i % 50, f"Sentence number {i} of the sample.", 0.5, 0
+        )
+        for i in range(count)
+    ]
+
+
+def append_concat(rows, _):
+    """Concatenate a one-row dataframe onto the table per row."""
+    df = pd.DataFrame()
+    for row in rows:
+        new_row = pd.DataFrame(row.dict(), index=[0])
+        df = pd.concat([df.loc[:], new_row]).reset_index(drop=True)
+    return len(df)
+
+
+def append_row(rows, _):
+    """Append one row at a time to the model."""
+    model = DataframeTableModel()
+    for row in rows:
+        model.appendRow(row)
+    return model.rowCount()
+
+
+def append_rows(rows, rows_per_document):
+    """Append one document of rows at a time to the model."""
+    model = DataframeTableModel()
+    for i in range(0, len(rows), rows_per_document):
+        model.appendRows(rows[i : i + rows_per_document])
+    model.dataframe()
+    return model.rowCount()
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    rows_per_document = int(args["--rows-per-document"])
+    concat_max_rows = int(args["--concat-max-rows"])
+    for count in [int(n) for n in args["--rows"].split(",")]:
+        rows = make_rows(count)
+        functions = [("appendRow", append_row), ("appendRows", append_rows)]
+        if count <= concat_max_rows:
+            functions.insert(0, ("pd.concat", append_concat))
+        for name, function in functions:
+            start = time.perf_counter()
+            function(rows, rows_per_document)
+            elapsed = time.perf_counter() - start
+            print(f"{count} rows, {name}: {elapsed:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
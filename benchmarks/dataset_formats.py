@@ -0,0 +1,88 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares saving and loading a dataset as CSV and in the compressed columnar
+formats, with the size of each file. The dataset is either read from a file or
+made up of <rows> rows of sentences of <text-length> characters, about 40 rows
+per file id; a few million rows make a dataset of several GB.
+
+Usage: dataset_formats.py [<dataset>] [options]
+
+Options:
+    -h --help               Show this help screen.
+    --rows=<n>              Number of rows of a made up dataset [default: 5000000].
+    --text-length=<n>       Length of the texts of a made up dataset [default: 500].
+    --directory=<path>      Directory to write the files to [default: .].
+    --formats=<suffixes>    Comma separated formats [default: .csv,.parquet,.feather].
+"""
+
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from docopt import docopt
+
+from benkpress.api.dataset import read_dataset, write_dataset
+
+
+def make_dataset(rows: int, text_length: int) -> pd.DataFrame:
+    words = ["".join(random.choices(string.ascii_lowercase, k=6)) for _ in range(5000)]
+    words_per_text = max(1, text_length // 7)
+    files = [f"{random.getrandbits(128):032x}" for _ in range(max(1, rows // 40))]
+    return pd.DataFrame(
+        {
+            "file": [files[i // 40 % len(files)] for i in range(rows)],
+            "page": np.arange(rows) % 40,
+            "text": [
+                " ".join(random.choices(words, k=words_per_text)) for _ in range(rows)
+            ],
+            "proba": np.random.random(rows),
+            "class": np.random.randint(0, 2, rows),
+        }
+    )
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    if args["<dataset>"]:
+        df = read_dataset(args["<dataset>"], index_col=0)
+    else:
+        df = make_dataset(int(args["--rows"]), int(args["--text-length"]))
+    directory = Path(args["--directory"])
+    for suffix in args["--formats"].split(","):
+        path = directory / f"dataset_formats_benchmark{suffix}"
+        start = time.perf_counter()
+        write_dataset(df, path)
+        save = time.perf_counter() - start
+        start = time.perf_counter()
+        read_dataset(path, index_col=0)
+        load = time.perf_counter() - start
+        size = path.stat().st_size / 1024**2
+        print(f"{suffix}: save {save:.1f} s, load {load:.1f} s, {size:.0f} MiB")
+        path.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
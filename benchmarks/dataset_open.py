@@ -0,0 +1,90 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures the time and memory it takes to open an Arrow IPC (.arrow) dataset in a
+dataset table model, eagerly and lazily, and then to display its first rows and
+to get all of its texts, as refitting does. Each way is measured in a fresh
+interpreter. Write an .arrow dataset with benkpress-convert-dataset --keep-ids.
+
+Usage: dataset_open.py <dataset> [options]
+
+Options:
+    -h --help       Show this help screen.
+    --visible=<n>   Number of rows to display [default: 40].
+    --once=<mode>   Make a single measurement in this interpreter, eager or lazy.
+"""
+
+import resource
+import subprocess
+import sys
+import time
+
+from docopt import docopt
+from PyQt6 import QtCore as qtc
+
+from benkpress.datamodel import DataframeTableModel
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_once(dataset: str, lazy: bool, visible: int):
+    start = time.perf_counter()
+    model = DataframeTableModel.load(dataset, lazy=lazy)
+    opened = time.perf_counter() - start
+    opened_rss = peak_rss_mib()
+    start = time.perf_counter()
+    for row in range(min(visible, model.rowCount())):
+        for column in range(model.columnCount()):
+            model.data(model.index(row, column), qtc.Qt.ItemDataRole.DisplayRole)
+    displayed = time.perf_counter() - start
+    start = time.perf_counter()
+    model.texts()
+    texts = time.perf_counter() - start
+    print(
+        f"{'lazy' if lazy else 'eager'}: open {opened:.2f} s ({opened_rss:.0f} MiB), "
+        f"display {displayed:.3f} s, texts {texts:.2f} s ({peak_rss_mib():.0f} MiB)"
+    )
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    visible = int(args["--visible"])
+    if args["--once"]:
+        measure_once(args["<dataset>"], args["--once"] == "lazy", visible)
+        return 0
+    for mode in ["eager", "lazy"]:
+        subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                args["<dataset>"],
+                f"--visible={visible}",
+                f"--once={mode}",
+            ],
+            check=True,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
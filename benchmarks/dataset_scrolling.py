@@ -0,0 +1,111 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures how many data() calls per second a dataset table model answers while
+scrolling through it, the way a table view asks for the display text of every
+visible cell and the foreground of every proba cell on each repaint. Every
+window is repainted a few times, as views do while scrolling. The old render path
+with iloc and get_loc on a dataframe is measured as well.
+
+Usage: dataset_scrolling.py [options]
+
+Options:
+    -h --help           Show this help screen.
+    --rows=<n>          Number of rows in the dataset [default: 500000].
+    --visible=<n>       Number of visible rows [default: 40].
+    --step=<n>          Number of rows scrolled per step [default: 3].
+    --steps=<n>         Number of scroll steps [default: 2000].
+    --repaints=<n>      Number of repaints per scroll step [default: 3].
+"""
+
+import sys
+import time
+
+from docopt import docopt
+from PyQt6 import QtCore as qtc
+from PyQt6 import QtGui as qtg
+
+from benkpress.datamodel import DataframeTableModel
+
+DISPLAY = qtc.Qt.ItemDataRole.DisplayRole
+FOREGROUND = qtc.Qt.ItemDataRole.ForegroundRole
+
+
+def make_model(count: int) -> DataframeTableModel:
+    model = DataframeTableModel()
+    model.appendRows(
+        [
+            DataframeTableModel.RowConfig(
+                f"{i // 50:032x}", i % 50, f"Sentence number {i}.", (i % 100) / 100, 0
+            )
+            for i in range(count)
+        ]
+    )
+    return model
+
+
+def iloc_data(df, index, role):
+    """The old render path of DataframeTableModel.data."""
+    if role == DISPLAY:
+        return str(df.iloc[index.row(), index.column()])
+    elif role == FOREGROUND:
+        if index.column() == df.columns.get_loc("proba"):
+            brush = qtg.QBrush()
+            brush.setColor(
+                qtg.QColor.fromRgb(
+                    0, int(255.0 * float(df.iloc[index.row(), index.column()])), 0
+                )
+            )
+            return brush
+    return None
+
+
+def scroll(model, data, args) -> float:
+    """Scroll through the model and return the number of data() calls per second."""
+    visible = int(args["--visible"])
+    step = int(args["--step"])
+    calls = 0
+    start = time.perf_counter()
+    for i in range(int(args["--steps"])):
+        first = (i * step) % max(1, model.rowCount() - visible)
+        for _ in range(int(args["--repaints"])):
+            for row in range(first, first + visible):
+                for column in range(model.columnCount()):
+                    index = model.index(row, column)
+                    data(index, DISPLAY)
+                    data(index, FOREGROUND)
+                    calls += 2
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    model = make_model(int(args["--rows"]))
+    df = model.dataframe()
+    for name, data in [
+        ("iloc", lambda index, role: iloc_data(df, index, role)),
+        ("columnar", model.data),
+    ]:
+        print(f"{name}: {scroll(model, data, args):.0f} data() calls/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
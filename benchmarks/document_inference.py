@@ -0,0 +1,79 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares per-page/per-sentence inference, as DocumentProcessor used to do it,
+with batched inference on a sentence-target document. The pipeline is fitted on a
+dataset, and the document is made up of the first <pages> page texts of it.
+
+Usage: document_inference.py <dataset> <pipeline> <page_filter> <spacy_model> [options]
+
+Options:
+    -h --help           Show this help screen.
+    --pages=<n>         Number of pages of the document [default: 200].
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from docopt import docopt
+
+from benkpress.api.tokenizer import Sentencizer
+from benkpress.plugin import PluginLoader
+
+
+def per_item(page_filter, pipeline, sentencizer, pages):
+    """Inference one page and one sentence at a time."""
+    kept = [page for page in pages if page_filter.predict([page])[0]]
+    sentences = [s for page in kept for s in sentencizer.sentencize(page)]
+    return [
+        (pipeline.predict_proba([s])[0][1], pipeline.predict([s])[0]) for s in sentences
+    ]
+
+
+def batched(page_filter, pipeline, sentencizer, pages):
+    """Inference all pages and all sentences at once."""
+    keep = page_filter.predict(pages)
+    kept = [page for page, k in zip(pages, keep) if k]
+    sentences = [s for x in sentencizer.sentencize_many(kept) for s in x]
+    probas = pipeline.predict_proba(sentences)
+    return list(zip(probas[:, 1], pipeline.classes_[np.argmax(probas, axis=1)]))
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    dataset = pd.read_csv(args["<dataset>"], index_col=False)
+    loader = PluginLoader()
+    pipeline = loader.load_pipeline(args["<pipeline>"])
+    pipeline.fit(dataset["text"].astype(str), dataset["class"])
+    page_filter = loader.load_page_filter(args["<page_filter>"])
+    sentencizer = Sentencizer(args["<spacy_model>"])
+    pages = dataset["text"].astype(str).head(int(args["--pages"])).tolist()
+    for name, function in [("Per item", per_item), ("Batched", batched)]:
+        start = time.perf_counter()
+        results = function(page_filter, pipeline, sentencizer, pages)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed:.2f} s for {len(results)} sentences")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares the time to fit the lemmatizing TF-IDF vectorization of the bundled
+Swedish pipeline, using Lemmatizer.lemmatize as vectorizer tokenizer versus the
+batched LemmatizingTransformer.
+
+Usage: lemmatizer_fit.py <dataset> [options]
+
+Options:
+    -h --help           Show this help screen.
+    --rows=<n>          Number of dataset rows to fit on [default: 10000].
+    --model=<name>      spaCy model [default: sv_core_news_lg].
+    --n-process=<n>     Number of processes for the transformer [default: 1].
+"""
+
+import sys
+import time
+
+import pandas as pd
+from docopt import docopt
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.pipeline import Pipeline
+
+from benkpress.api.tokenizer import Lemmatizer, LemmatizingTransformer
+from benkpress.plugin import _passthrough_analyzer
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    dataset = pd.read_csv(args["<dataset>"], index_col=False)
+    X = dataset["text"].astype(str).head(int(args["--rows"]))
+
+    lemmatizer = Lemmatizer(args["--model"])
+    vectorizer = TfidfVectorizer(tokenizer=lemmatizer.lemmatize)
+    start = time.perf_counter()
+    vectorizer.fit(X)
+    before = time.perf_counter() - start
+    print(f"Lemmatizer.lemmatize as tokenizer: {before:.1f} s")
+
+    pipeline = Pipeline(
+        [
+            (
+                "Lemmatizer",
+                LemmatizingTransformer(
+                    args["--model"], n_process=int(args["--n-process"])
+                ),
+            ),
+            ("Vectorizer", TfidfVectorizer(analyzer=_passthrough_analyzer)),
+        ]
+    )
+    start = time.perf_counter()
+    pipeline.fit(X)
+    after = time.perf_counter() - start
+    print(f"LemmatizingTransformer: {after:.1f} s ({before / after:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
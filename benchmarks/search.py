@@ -0,0 +1,99 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures the time to search the texts of a dataset with the inverted index behind
+the dataset table filter: building the index, adding one document of rows to it,
+and answering queries of common and rare terms. The same queries are answered by
+scanning the texts with pandas as well, for comparison.
+
+Usage: search.py [options]
+
+Options:
+    -h --help                Show this help screen.
+    --rows=<n>               Number of rows of the dataset [default: 1000000].
+    --words-per-row=<n>      Number of words of each text [default: 20].
+    --vocabulary=<n>         Number of distinct words [default: 50000].
+    --rows-per-document=<n>  Number of rows added at a time [default: 50].
+    --queries=<q>            Queries separated by ';' [default: w1;w1 w2;w4999;w9 w999].
+    --seed=<n>               Random seed [default: 0].
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from docopt import docopt
+
+from benkpress.api.search import InvertedIndex, terms
+
+
+def make_texts(rows: int, words_per_row: int, vocabulary: int, seed: int) -> list[str]:
+    """Make texts of words drawn with Zipf-like frequencies, like natural text."""
+    rng = np.random.default_rng(seed)
+    ranks = rng.zipf(1.2, size=(rows, words_per_row)) % vocabulary
+    return [" ".join(f"w{rank}" for rank in row) for row in ranks]
+
+
+def scan(texts: pd.Series, query: str) -> np.ndarray:
+    """Find the rows containing all terms of the query by scanning the texts."""
+    mask = np.ones(len(texts), dtype=bool)
+    for term in terms(query):
+        mask &= texts.str.contains(rf"\b{term}\b", regex=True).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    rows_per_document = int(args["--rows-per-document"])
+    texts = make_texts(
+        int(args["--rows"]),
+        int(args["--words-per-row"]),
+        int(args["--vocabulary"]),
+        int(args["--seed"]),
+    )
+
+    index = InvertedIndex()
+    start = time.perf_counter()
+    index.add(texts[:-rows_per_document])
+    print(f"Build index of {index.row_count} rows: {time.perf_counter() - start:.2f} s")
+    start = time.perf_counter()
+    index.add(texts[-rows_per_document:])
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Add {rows_per_document} rows: {elapsed:.2f} ms")
+
+    series = pd.Series(texts)
+    for query in args["--queries"].split(";"):
+        start = time.perf_counter()
+        rows = index.query(query)
+        indexed = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        scanned_rows = scan(series, query)
+        scanned = (time.perf_counter() - start) * 1000
+        assert np.array_equal(rows, scanned_rows)
+        print(
+            f"Query {query!r}, {len(rows)} rows: "
+            f"index {indexed:.2f} ms, scan {scanned:.0f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
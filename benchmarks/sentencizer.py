@@ -0,0 +1,65 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares sentences per second of splitting page texts one at a time with the full
+spaCy pipeline, as benkpress used to do for sentence targets, with the batched
+Sentencizer. The page texts are taken from the text column of a page dataset.
+
+Usage: sentencizer.py <dataset> <spacy_model> [options]
+
+Options:
+    -h --help           Show this help screen.
+    --n-process=<n>     Number of processes for the batched run [default: 1].
+"""
+
+import sys
+import time
+
+import pandas as pd
+import spacy
+from docopt import docopt
+
+from benkpress.api.tokenizer import Sentencizer
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    texts = pd.read_csv(args["<dataset>"], index_col=False)["text"].astype(str)
+    texts = texts.tolist()
+
+    nlp = spacy.load(args["<spacy_model>"])
+    start = time.perf_counter()
+    sentences = sum(len(list(nlp(text).sents)) for text in texts)
+    elapsed = time.perf_counter() - start
+    print(f"Per page, full pipeline: sentences/s={sentences / elapsed:.1f}")
+
+    sentencizer = Sentencizer(args["<spacy_model>"])
+    start = time.perf_counter()
+    sentences = sum(
+        len(x)
+        for x in sentencizer.sentencize_many(texts, n_process=int(args["--n-process"]))
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Batched, sentence components: sentences/s={sentences / elapsed:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
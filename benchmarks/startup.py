@@ -0,0 +1,90 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures the time from interpreter start to the first shown main window, as
+well as the time to create plugin loaders with a cold and a warm entry point
+index. Each run is made in a fresh interpreter.
+
+Usage: startup.py [options]
+
+Options:
+    -h --help       Show this help screen.
+    --runs=<n>      Number of runs [default: 5].
+    --once          Make a single measurement in this interpreter.
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+from docopt import docopt
+
+_START = time.perf_counter()
+
+
+def measure_once():
+    """Print the time to first window, and to create cold and warm plugin loaders."""
+    from PyQt6 import QtCore as qtc
+
+    from benkpress.application import Application
+    from benkpress.plugin import PluginLoader, invalidate_entry_point_index
+
+    app = Application(sys.argv[:1])
+
+    def report():
+        first_window = time.perf_counter() - _START
+        invalidate_entry_point_index()
+        start = time.perf_counter()
+        PluginLoader()
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        PluginLoader()
+        warm = time.perf_counter() - start
+        print(first_window, cold, warm)
+        app.quit()
+
+    qtc.QTimer.singleShot(0, report)
+    app.exec()
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    if args["--once"]:
+        measure_once()
+        return 0
+    measurements = []
+    for _ in range(int(args["--runs"])):
+        output = subprocess.run(
+            [sys.executable, __file__, "--once"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        measurements.append([float(x) for x in output.split()[-3:]])
+    first_window, cold, warm = (statistics.median(x) for x in zip(*measurements))
+    print(f"Time to first window: {first_window:.3f} s (median)")
+    print(f"PluginLoader, cold index: {1000 * cold:.2f} ms (median)")
+    print(f"PluginLoader, warm index: {1000 * warm:.2f} ms (median)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
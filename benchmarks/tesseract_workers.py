@@ -0,0 +1,65 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures how TesseractReader throughput scales with the number of OCR workers.
+
+Usage: tesseract_workers.py <sample_folder> [options]
+
+Options:
+    -h --help                   Show this help screen.
+    --max-workers=<n>           Largest worker count to try [default: 4].
+    --dpi=<dpi>                 Rasterization resolution [default: 100].
+    --language=<lang>           Tesseract language [default: eng].
+    --poppler-path=<path>       Path to the poppler binaries [default: ].
+    --tesseract-path=<path>     Path to the tesseract binary [default: ].
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from docopt import docopt
+
+from benkpress.api.reader import TesseractReader
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    sample = sorted(f for f in Path(args["<sample_folder>"]).iterdir() if f.is_file())
+    for workers in range(1, int(args["--max-workers"]) + 1):
+        reader = TesseractReader(
+            poppler_path=args["--poppler-path"],
+            tesseract_path=args["--tesseract-path"],
+            tesseract_language=args["--language"],
+            dpi=int(args["--dpi"]),
+            workers=workers,
+        )
+        pages = 0
+        start = time.perf_counter()
+        for filepath in sample:
+            pages += len(reader.read(filepath))
+        elapsed = time.perf_counter() - start
+        reader.close()
+        print(f"workers={workers} pages={pages} pages/s={pages / elapsed:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""benkpress.api.cache
+
+Persistent cache of page texts produced by readers.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from hashlib import sha256
+from pathlib import Path
+from typing import Optional
+
+from appdirs import user_data_dir
+
+from benkpress.api.hash import content_digest
+from benkpress.api.reader import Reader
+
+logger = logging.getLogger(__name__)
+
+
+class PageTextCache:
+    """A persistent, size bounded cache of the page texts of read documents.
+
+    Entries are keyed by the contents of the document together with the `repr` of
+    the reader, so that the same file read with another reader or other reader
+    settings (e.g. DPI or language) is a separate entry. When the total size of the
+    cached texts exceeds `max_bytes`, the least recently used entries are evicted.
+    The cache is safe to use from multiple threads.
+    """
+
+    DEFAULT_PATH = (
+        Path(user_data_dir("benkpress", "dennishedback")) / "cache" / "pages.sqlite"
+    )
+
+    def __init__(self, path: Path = DEFAULT_PATH, max_bytes: int = 512 * 1024**2):
+        """Open or create a cache at the given path."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT PRIMARY KEY, "
+                "pages TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "accessed REAL NOT NULL)"
+            )
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, reader: Reader, filepath: Path) -> str:
+        """Returns the cache key of a document read with the given reader."""
+        return sha256(f"{content_digest(filepath)}:{reader!r}".encode()).hexdigest()
+
+    def get(self, reader: Reader, filepath: Path) -> Optional[list[tuple[int, str]]]:
+        """Returns the cached `(page_number, text)` pairs of a document, or None on
+        a cache miss."""
+        key = self.key(reader, filepath)
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT pages FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._connection.execute(
+                    "UPDATE pages SET accessed = ? WHERE key = ?", (time.time(), key)
+                )
+        logger.info(
+            f"Page cache {'miss' if row is None else 'hit'} for {filepath} "
+            f"(hits={self.hits}, misses={self.misses})"
+        )
+        if row is None:
+            return None
+        return [(page_number, text) for page_number, text in json.loads(row[0])]
+
+    def put(self, reader: Reader, filepath: Path, pages: list[tuple[int, str]]) -> None:
+        """Caches the `(page_number, text)` pairs of a document."""
+        key = self.key(reader, filepath)
+        value = json.dumps(pages)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """Evicts the least recently used entries until the cache fits its bound."""
+        total = 0
+        evicted = []
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM pages ORDER BY accessed DESC"
+        ):
+            total += size
+            if total > self._max_bytes:
+                evicted.append((key,))
+        if evicted:
+            self._connection.executemany("DELETE FROM pages WHERE key = ?", evicted)
+            logger.debug(f"Evicted {len(evicted)} entries from the page cache.")
+
+    def __repr__(self):
+        return (
+            f"benkpress.api.cache.PageTextCache({self._path}, "
+            f"max_bytes={self._max_bytes})"
+        )
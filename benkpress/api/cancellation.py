@@ -0,0 +1,48 @@
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""benkpress.api.cancellation
+
+Cooperative cancellation of work running in other threads.
+"""
+
+import threading
+
+
+class Cancelled(Exception):
+    """Raised by work that notices that it has been cancelled."""
+
+
+class CancellationToken:
+    """A token that work running in other threads checks every now and then, for
+    instance between pages and between stages, to find out whether it should
+    stop. Cancelling a token is thread-safe and cannot be undone."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation of the work holding this token."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        """Raise `Cancelled` if cancellation has been requested."""
+        if self._event.is_set():
+            raise Cancelled
@@ -0,0 +1,158 @@
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""benkpress.api.dataset
+
+Reading and writing of datasets in the format given by the file extension.
+"""
+
+import os
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import ipc
+except ImportError:
+    pa = None
+
+# Extensions of columnar formats, which require pyarrow. Feather is the Arrow IPC
+# file format, so ".arrow" files are read and written as Feather, but uncompressed
+# so that they can be memory-mapped and read lazily.
+PARQUET_SUFFIXES = {".parquet"}
+FEATHER_SUFFIXES = {".feather", ".arrow"}
+LAZY_SUFFIXES = {".arrow"}
+COLUMNAR_SUFFIXES = PARQUET_SUFFIXES | FEATHER_SUFFIXES
+
+# The number of rows of each record batch of Arrow IPC files, which is the number
+# of rows read at a time when reading lazily.
+ARROW_BATCH_ROWS = 16384
+
+# The filter of file dialogs for saving and opening datasets.
+FILE_DIALOG_FILTER = (
+    "Comma separated values (*.csv);;"
+    "Parquet (*.parquet);;"
+    "Feather (*.feather *.arrow);;"
+    "All files (*.*)"
+)
+
+
+def _suffix(filepath_or_buffer: Any) -> str:
+    if isinstance(filepath_or_buffer, (str, os.PathLike)):
+        return Path(filepath_or_buffer).suffix.lower()
+    return ""
+
+
+def is_columnar(filepath_or_buffer: Any) -> bool:
+    """Whether a dataset path has the extension of a columnar format."""
+    return _suffix(filepath_or_buffer) in COLUMNAR_SUFFIXES
+
+
+def read_dataset(filepath_or_buffer: Any, **csv_kwargs) -> pd.DataFrame:
+    """Read a dataset in the format given by the file extension. Anything but a
+    columnar format is read as CSV, with the given keyword arguments."""
+    suffix = _suffix(filepath_or_buffer)
+    if suffix in PARQUET_SUFFIXES:
+        return pd.read_parquet(filepath_or_buffer)
+    if suffix in FEATHER_SUFFIXES:
+        return pd.read_feather(filepath_or_buffer)
+    return pd.read_csv(filepath_or_buffer, **csv_kwargs)
+
+
+def write_dataset(df: pd.DataFrame, filepath_or_buffer: Any, **csv_kwargs) -> None:
+    """Write a dataset in the format given by the file extension. Anything but a
+    columnar format is written as CSV, with the given keyword arguments.
+
+    Columnar formats are written without the index, and with the file ids
+    dictionary encoded, since every file id is repeated for each of the pages or
+    sentences of the file. All but ".arrow" files are compressed."""
+    suffix = _suffix(filepath_or_buffer)
+    if suffix not in COLUMNAR_SUFFIXES:
+        df.to_csv(filepath_or_buffer, **csv_kwargs)
+        return
+    df = df.reset_index(drop=True)
+    if "file" in df.columns:
+        df = df.assign(file=df["file"].astype("category"))
+    if suffix in PARQUET_SUFFIXES:
+        df.to_parquet(filepath_or_buffer, compression="zstd", index=False)
+    elif suffix in LAZY_SUFFIXES:
+        df.to_feather(
+            filepath_or_buffer, compression="uncompressed", chunksize=ARROW_BATCH_ROWS
+        )
+    else:
+        df.to_feather(filepath_or_buffer, compression="zstd")
+
+
+def is_lazy_loadable(filepath: Any) -> bool:
+    """Whether a dataset can be read lazily with `MemoryMappedColumns`."""
+    return _suffix(filepath) in LAZY_SUFFIXES
+
+
+class MemoryMappedColumns:
+    """The columns of an uncompressed Arrow IPC dataset file, memory-mapped so that
+    they can be read one record batch at a time, without reading the whole file."""
+
+    def __init__(self, filepath: Path):
+        if pa is None:
+            raise ImportError("Reading datasets lazily requires pyarrow")
+        self._filepath = filepath
+        self._reader = ipc.open_file(pa.memory_map(str(filepath)))
+        # The first row of each record batch, followed by the number of rows.
+        self._offsets = [0]
+        for i in range(self._reader.num_record_batches):
+            self._offsets.append(self._offsets[-1] + self._reader.get_batch(i).num_rows)
+
+    @property
+    def filepath(self) -> Path:
+        return self._filepath
+
+    @property
+    def names(self) -> list[str]:
+        return self._reader.schema.names
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    def read(self, names: list[str]) -> pd.DataFrame:
+        """Read the given columns, in full."""
+        return self._reader.read_all().select(names).to_pandas()
+
+    def read_column(self, name: str) -> np.ndarray:
+        """Read a single column, in full."""
+        return self._reader.read_all().column(name).to_numpy(zero_copy_only=False)
+
+    def read_batch(self, name: str, row: int) -> tuple[int, np.ndarray]:
+        """Read the values of a column in the record batch holding the given row.
+        Returns the first row of the batch and its values."""
+        i = bisect_right(self._offsets, row) - 1
+        batch = self._reader.get_batch(i)
+        values = batch.column(batch.schema.get_field_index(name))
+        return self._offsets[i], values.to_numpy(zero_copy_only=False)
+
+    def iter_batches(self, name: str) -> Iterator[tuple[int, np.ndarray]]:
+        """Read a column one record batch at a time. Yields the first row of each
+        batch and its values."""
+        for i in range(self._reader.num_record_batches):
+            batch = self._reader.get_batch(i)
+            values = batch.column(batch.schema.get_field_index(name))
+            yield self._offsets[i], values.to_numpy(zero_copy_only=False)
+
+    def __repr__(self):
+        return f"benkpress.api.dataset.MemoryMappedColumns({self._filepath})"
@@ -16,13 +16,105 @@
 
 """benkpress.api.hash
 
-Small module for producing hash digests of filepaths.
+Small module for producing hash digests of filepaths and file contents.
 """
 
-from hashlib import md5
+import atexit
+import sqlite3
+import threading
+from hashlib import blake2b, md5
 from pathlib import Path
+from typing import Optional
+
+from appdirs import user_data_dir
 
 
 def filename_digest(filepath: Path) -> str:
     """Produces a hash digest of a filename."""
     return md5(filepath.name.encode()).hexdigest()
+
+
+def _hash_file(filepath: Path, chunk_size: int = 1 << 20) -> str:
+    """Produces a hash digest of the contents of a file, read in chunks."""
+    digest = blake2b(digest_size=32)
+    with filepath.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DigestIndex:
+    """A persistent memo of content digests, keyed by the device, inode, size and
+    modification time of a file. A file whose stat key is unchanged is assumed to
+    have unchanged contents and is not read again. The index is safe to use from
+    multiple threads. New digests are written to disk in batches, and when the
+    interpreter exits.
+    """
+
+    DEFAULT_PATH = (
+        Path(user_data_dir("benkpress", "dennishedback")) / "cache" / "digests.sqlite"
+    )
+
+    def __init__(self, path: Path = DEFAULT_PATH, batch_size: int = 256):
+        """Open or create an index at the given path."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._batch_size = batch_size
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS digests ("
+                "device INTEGER, inode INTEGER, size INTEGER, mtime INTEGER, "
+                "digest TEXT NOT NULL, "
+                "PRIMARY KEY (device, inode, size, mtime))"
+            )
+        self._memo = {
+            tuple(row[:4]): row[4]
+            for row in self._connection.execute("SELECT * FROM digests")
+        }
+        self._pending: list[tuple] = []
+        atexit.register(self.flush)
+
+    def digest(self, filepath: Path) -> str:
+        """Produces a hash digest of the contents of a file."""
+        stat = filepath.stat()
+        key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._memo.get(key)
+        if digest is None:
+            digest = _hash_file(filepath)
+            with self._lock:
+                self._memo[key] = digest
+                self._pending.append(key + (digest,))
+                if len(self._pending) >= self._batch_size:
+                    self._flush()
+        return digest
+
+    def flush(self) -> None:
+        """Writes new digests to disk."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?)",
+                    self._pending,
+                )
+            self._pending = []
+
+
+_default_index: Optional[DigestIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def content_digest(filepath: Path) -> str:
+    """Produces a hash digest of the contents of a file. Unlike `filename_digest`,
+    renamed copies of a file get the same digest, and different files with the same
+    name get different digests. Memoized in a persistent `DigestIndex`."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DigestIndex()
+    return _default_index.digest(filepath)
@@ -0,0 +1,193 @@
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""benkpress.api.journal
+
+Write-ahead journal of the changes made to a dataset during a tagging session.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from appdirs import user_data_dir
+
+logger = logging.getLogger(__name__)
+
+
+def _to_builtin(value: Any) -> Any:
+    # numpy scalars have an item method returning the equivalent builtin.
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class DatasetJournal:
+    """An append-only journal of the rows appended to a dataset and the values
+    edited in it, from which the dataset can be recovered after a crash.
+
+    Every record is a line of JSON that is flushed to disk as soon as it is written.
+    The first record names the base dataset file that the other records apply to,
+    with the number of rows it had; with no base file, the dataset was empty. When
+    the journal grows long, it is compacted by writing the whole dataset to a new
+    snapshot that becomes the new base, and when the dataset is saved by the user,
+    the saved file becomes the new base. A base is never overwritten, so a crash
+    in the middle of a compaction leaves either the old or the new journal intact.
+
+    The snapshot of a compaction may be written in another thread while records
+    are still being written, between `start_compaction` and `finish_compaction`.
+    The records written in the meantime are carried over to the new journal.
+    """
+
+    DEFAULT_DIRECTORY = Path(user_data_dir("benkpress", "dennishedback")) / "autosave"
+    JOURNAL_NAME = "journal.jsonl"
+    SNAPSHOT_PATTERN = "snapshot-*.csv"
+
+    def __init__(self, directory: Path = DEFAULT_DIRECTORY, compact_every: int = 1000):
+        """Open the journal in the given directory. It is compacted once it holds
+        `compact_every` records."""
+        directory.mkdir(parents=True, exist_ok=True)
+        self._directory = directory
+        self._path = directory / self.JOURNAL_NAME
+        self._compact_every = compact_every
+        self._file = None
+        self._record_count = 0
+        self._compaction_path: Optional[Path] = None
+
+    def _snapshot_paths(self) -> list[Path]:
+        return list(self._directory.glob(self.SNAPSHOT_PATTERN))
+
+    def has_changes(self) -> bool:
+        """Whether the journal holds any changes to its base dataset."""
+        return any(record["op"] != "base" for record in self.records())
+
+    def records(self) -> Iterator[dict]:
+        """Iterate over the records of the journal. A record that was cut short by a
+        crash ends the journal."""
+        if not self._path.exists():
+            return
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Truncated journal record in {self._path}")
+                    return
+
+    def start(self, base: Optional[Path] = None, base_rows: int = 0) -> None:
+        """Start a new journal of changes to the given base dataset file, discarding
+        all previous records and all snapshots but the base."""
+        self._rebase(base, base_rows, "")
+
+    def _rebase(self, base: Optional[Path], base_rows: int, records: str) -> None:
+        """Replace the journal with one based on the given base dataset file,
+        holding the given lines of records."""
+        self.close()
+        path = None if base is None else str(base)
+        temporary_path = self._path.with_suffix(".tmp")
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"op": "base", "path": path, "rows": base_rows}) + "\n")
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, self._path)
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._record_count = records.count("\n")
+        for snapshot_path in self._snapshot_paths():
+            if snapshot_path != base:
+                snapshot_path.unlink(missing_ok=True)
+        logger.debug(f"Started journal {self._path} on base {base} ({base_rows} rows)")
+
+    def append_rows(self, rows: list[dict]) -> None:
+        """Record rows appended to the dataset."""
+        self._write({"op": "append", "rows": rows})
+
+    def set_value(self, row: int, column: str, value: Any) -> None:
+        """Record the edit of a single value of the dataset."""
+        self._write({"op": "set", "row": row, "column": column, "value": value})
+
+    def needs_compaction(self) -> bool:
+        return self._record_count >= self._compact_every
+
+    def compact(self, dataframe: Any) -> None:
+        """Write the whole dataset, as a pandas dataframe, to a new snapshot and
+        start a new journal based on it."""
+        snapshot_path, position = self.start_compaction()
+        self.write_snapshot(snapshot_path, [dataframe])
+        self.finish_compaction(snapshot_path, len(dataframe), position)
+
+    def start_compaction(self) -> tuple[Path, int]:
+        """Start a compaction. Returns the path to write the snapshot to, and the
+        position in the journal from which records are carried over."""
+        self._file.flush()
+        self._compaction_path = self._directory / f"snapshot-{time.time_ns()}.csv"
+        return self._compaction_path, self._file.tell()
+
+    @staticmethod
+    def write_snapshot(snapshot_path: Path, dataframes: Iterable[Any]) -> None:
+        """Write the whole dataset to a snapshot, as consecutive pandas dataframes
+        of its rows, indexed by row. May be called from any thread."""
+        temporary_path = snapshot_path.with_suffix(".tmp")
+        header = True
+        with open(temporary_path, "w", encoding="utf-8", newline="") as f:
+            for dataframe in dataframes:
+                dataframe.to_csv(f, header=header)
+                header = False
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, snapshot_path)
+
+    def finish_compaction(self, snapshot_path: Path, rows: int, position: int) -> None:
+        """Start a new journal based on a snapshot written since `start_compaction`
+        with the given number of rows, carrying over the records written since. If
+        the journal has been restarted in the meantime, the snapshot is discarded
+        instead."""
+        if snapshot_path != self._compaction_path:
+            snapshot_path.unlink(missing_ok=True)
+            return
+        self._file.flush()
+        with open(self._path, "rb") as f:
+            f.seek(position)
+            records = f.read().decode("utf-8")
+        self._rebase(snapshot_path, rows, records)
+        logger.info(f"Compacted journal into {snapshot_path}")
+
+    def discard(self) -> None:
+        """Discard the journal and its snapshots, e.g. once the session is over."""
+        self.close()
+        self._path.unlink(missing_ok=True)
+        for path in self._snapshot_paths():
+            path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        self._compaction_path = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record: dict) -> None:
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, default=_to_builtin) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._record_count += 1
+
+    def __repr__(self):
+        return f"benkpress.api.journal.DatasetJournal({self._directory})"
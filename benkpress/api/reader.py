@@ -14,13 +14,29 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Protocol
+from typing import Iterator, Optional, Protocol, runtime_checkable
 
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PyPDF2 import PdfFileReader
 
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
 # TODO: Solve code duplication between read methods, specifically regarding
 # cleaning of text such as " ".join(...). Perhaps using a decorator?
 
@@ -33,8 +49,152 @@ class Reader(Protocol):
         ...
 
 
+@dataclass
+class ReaderSettings:
+    """Raw settings that readers are created from. Readers are installed as
+    `benkpress_plugins.readers` entry points referring to a class with a
+    `from_settings` class method taking an instance of this class. A reader class
+    may list the names of the settings it uses in a `SETTINGS` attribute, so that
+    the user interface can disable the other settings."""
+
+    dpi: int = 100
+    language: str = "eng"
+    poppler_path: str = ""
+    tesseract_path: str = ""
+    workers: int = 1
+    rescan_dpi: int = 0
+    min_confidence: float = 60.0
+
+
+@runtime_checkable
+class PageReader(Protocol):
+    """A protocol for reading PDF files one page at a time."""
+
+    def iter_pages(self, filepath: Path) -> Iterator[tuple[int, str]]:
+        """Lazily yields `(page_number, text)` for each page of a PDF file. Page
+        numbers start at one."""
+        ...
+
+
+def iter_pages(reader: Reader, filepath: Path) -> Iterator[tuple[int, str]]:
+    """Lazily yields `(page_number, text)` for each page of a PDF file, falling back
+    to `reader.read` for readers that do not implement the `PageReader` protocol."""
+    if isinstance(reader, PageReader):
+        yield from reader.iter_pages(filepath)
+    else:
+        yield from enumerate(reader.read(filepath), start=1)
+
+
+def process_context() -> multiprocessing.context.BaseContext:
+    """The context to start reader processes in. Forking the multithreaded GUI
+    process is unsafe, so they are forked from a clean fork server where available,
+    and spawned otherwise."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["benkpress.api.reader"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _ocr_image(image, tesseract_language: str, tesseract_cmd: Optional[str]) -> str:
+    """OCR a single page image. Module level so that it can be sent to a worker
+    process. The Tesseract command is passed explicitly since worker processes do
+    not necessarily inherit the configuration of the parent process."""
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    return " ".join(
+        pytesseract.image_to_string(image, lang=tesseract_language).strip().split()
+    )
+
+
+def _rasterize_page(filepath: Path, page_number: int, dpi: int, poppler_path: str):
+    """Rasterize a single page of a PDF file."""
+    return convert_from_path(
+        filepath,
+        dpi,
+        first_page=page_number,
+        last_page=page_number,
+        poppler_path=poppler_path,
+    )[0]
+
+
+def _mean_confidence(data: dict) -> float:
+    """Returns the mean word confidence of Tesseract output data, or zero if no
+    words were recognized."""
+    confidences = [
+        float(conf)
+        for conf, word in zip(data["conf"], data["text"])
+        if float(conf) >= 0 and word.strip()
+    ]
+    return sum(confidences) / len(confidences) if confidences else 0.0
+
+
+def _ocr_page(
+    filepath: Path,
+    page_number: int,
+    dpi: int,
+    poppler_path: str,
+    tesseract_language: str,
+    tesseract_cmd: Optional[str],
+    rescan_dpi: int = 0,
+    min_confidence: float = 0.0,
+) -> tuple[str, bool]:
+    """Rasterize and OCR a single page. Done in one step so that page images
+    never have to leave the worker process.
+
+    If `rescan_dpi` is given, the page is first OCR:ed at `dpi`, and re-rasterized
+    and OCR:ed again at `rescan_dpi` if the mean word confidence is below
+    `min_confidence`. Returns the text and whether the page was re-scanned.
+    """
+    image = _rasterize_page(filepath, page_number, dpi, poppler_path)
+    if not rescan_dpi:
+        return _ocr_image(image, tesseract_language, tesseract_cmd), False
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    data = pytesseract.image_to_data(
+        image, lang=tesseract_language, output_type=pytesseract.Output.DICT
+    )
+    if _mean_confidence(data) >= min_confidence:
+        return " ".join(" ".join(data["text"]).split()), False
+    image = _rasterize_page(filepath, page_number, rescan_dpi, poppler_path)
+    return _ocr_image(image, tesseract_language, tesseract_cmd), True
+
+
 class TesseractReader:
-    """A reader that uses Tesseract OCR to read PDF files. Slow but precise."""
+    """A reader that uses Tesseract OCR to read PDF files. Slow but precise.
+
+    Pages are rasterized one at a time, so that at most one page image per worker
+    is held in memory. If `workers` is greater than one, pages are OCR:ed in a pool
+    of that many worker processes. The text is returned in page order regardless.
+    The pool is started on the first document and kept for the lifetime of the
+    reader. It is not carried over when the reader is pickled.
+
+    If `rescan_dpi` is set, the reader works adaptively: pages are OCR:ed at `dpi`
+    first, and only pages whose mean word confidence is below `min_confidence`
+    (0-100) are re-rasterized and OCR:ed again at `rescan_dpi`.
+    """
+
+    SETTINGS = (
+        "dpi",
+        "language",
+        "poppler_path",
+        "tesseract_path",
+        "workers",
+        "rescan_dpi",
+        "min_confidence",
+    )
+
+    @classmethod
+    def from_settings(cls, settings: ReaderSettings) -> TesseractReader:
+        return cls(
+            poppler_path=settings.poppler_path,
+            tesseract_path=settings.tesseract_path,
+            tesseract_language=settings.language,
+            dpi=settings.dpi,
+            workers=settings.workers,
+            rescan_dpi=settings.rescan_dpi,
+            min_confidence=settings.min_confidence,
+        )
 
     def __init__(
         self,
@@ -42,38 +202,350 @@ class TesseractReader:
         tesseract_path: str,
         tesseract_language: str,
         dpi: int = 100,
+        workers: int = 1,
+        rescan_dpi: int = 0,
+        min_confidence: float = 60.0,
     ):
         if tesseract_path:
             pytesseract.pytesseract.tesseract_cmd = tesseract_path
         self.poppler_path = poppler_path
+        self.tesseract_path = tesseract_path
         self.tesseract_language = tesseract_language
         self.dpi = dpi
+        self.workers = workers
+        self.rescan_dpi = rescan_dpi if rescan_dpi > dpi else 0
+        self.min_confidence = min_confidence
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Guards the creation of the pool, since documents may be read in several
+        # threads.
+        self._executor_lock = threading.Lock()
+
+    def page_count(self, filepath: Path) -> int:
+        """Returns the number of pages of a PDF file."""
+        return pdfinfo_from_path(filepath, poppler_path=self.poppler_path)["Pages"]
+
+    def _ocr_page_args(self, filepath: Path, page_number: int) -> tuple:
+        return (
+            filepath,
+            page_number,
+            self.dpi,
+            self.poppler_path,
+            self.tesseract_language,
+            self.tesseract_path,
+            self.rescan_dpi,
+            self.min_confidence,
+        )
+
+    def read_page(self, filepath: Path, page_number: int) -> str:
+        """Reads a single page of a PDF file."""
+        text, _ = _ocr_page(*self._ocr_page_args(filepath, page_number))
+        return text
+
+    def iter_pages(self, filepath: Path) -> Iterator[tuple[int, str]]:
+        page_numbers = range(1, self.page_count(filepath) + 1)
+        if self.workers > 1 and len(page_numbers) > 1:
+            results = self._iter_pages_parallel(filepath, page_numbers)
+        else:
+            results = (
+                (page_number, _ocr_page(*self._ocr_page_args(filepath, page_number)))
+                for page_number in page_numbers
+            )
+        rescanned_pages = 0
+        for page_number, (text, rescanned) in results:
+            rescanned_pages += rescanned
+            yield page_number, text
+        if self.rescan_dpi and page_numbers:
+            logger.info(
+                f"Re-scanned {rescanned_pages} of {len(page_numbers)} pages of "
+                f"{filepath} at {self.rescan_dpi} DPI "
+                f"({100.0 * rescanned_pages / len(page_numbers):.0f}%)"
+            )
+
+    def _iter_pages_parallel(
+        self, filepath: Path, page_numbers: range
+    ) -> Iterator[tuple[int, tuple[str, bool]]]:
+        # Keep no more pages of a document in flight than there are workers, so
+        # that memory stays bounded by one page image per worker.
+        executor = self._pool()
+        in_flight = deque()
+        for page_number in page_numbers:
+            future = executor.submit(
+                _ocr_page, *self._ocr_page_args(filepath, page_number)
+            )
+            in_flight.append((page_number, future))
+            if len(in_flight) >= self.workers:
+                done_page_number, done_future = in_flight.popleft()
+                yield done_page_number, done_future.result()
+        for page_number, future in in_flight:
+            yield page_number, future.result()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=process_context()
+                )
+            return self._executor
 
     def read(self, filepath: Path) -> list[str]:
-        images = convert_from_path(filepath, self.dpi, poppler_path=self.poppler_path)
-        return [
-            " ".join(
-                pytesseract.image_to_string(img, lang=self.tesseract_language)
-                .strip()
-                .split()
+        return [text for _, text in self.iter_pages(filepath)]
+
+    def close(self) -> None:
+        """Shuts down the pool of worker processes."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        del state["_executor_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._executor_lock = threading.Lock()
+
+    def __repr__(self):
+        # The number of workers is deliberately left out, since it does not
+        # affect the output of the reader.
+        if self.rescan_dpi:
+            return (
+                "benkpress.api.reader.TesseractReader("
+                f"tesseract_language={self.tesseract_language}, dpi={self.dpi}, "
+                f"rescan_dpi={self.rescan_dpi}, min_confidence={self.min_confidence})"
             )
-            for img in images
+        return f"benkpress.api.reader.TesseractReader(tesseract_language={self.tesseract_language}, dpi={self.dpi})"
+
+
+class TesserocrReader:
+    """A reader that keeps a pool of Tesseract engines alive for its whole lifetime
+    and feeds them page images in memory, through the tesserocr bindings. Produces
+    the same kind of output as TesseractReader, but does not pay for starting a
+    process, loading the language model and writing a temporary image per page,
+    which dominates on short documents. Requires the optional tesserocr package.
+
+    The engines are created lazily, and are not carried over when the reader is
+    pickled, e.g. when sent to another process.
+    """
+
+    SETTINGS = ("dpi", "language", "poppler_path", "workers")
+
+    @classmethod
+    def from_settings(cls, settings: ReaderSettings) -> TesserocrReader:
+        return cls(
+            poppler_path=settings.poppler_path,
+            tesseract_language=settings.language,
+            dpi=settings.dpi,
+            workers=settings.workers,
+        )
+
+    def __init__(
+        self,
+        poppler_path: str,
+        tesseract_language: str,
+        dpi: int = 100,
+        workers: int = 1,
+        tessdata_path: str = "",
+    ):
+        if tesserocr is None:
+            raise ImportError("TesserocrReader requires the tesserocr package.")
+        self.poppler_path = poppler_path
+        self.tesseract_language = tesseract_language
+        self.dpi = dpi
+        self.workers = workers
+        self.tessdata_path = tessdata_path
+        self._engines: Optional[queue.Queue] = None
+
+    def _engine_pool(self) -> queue.Queue:
+        if self._engines is None:
+            self._engines = queue.Queue()
+            for _ in range(self.workers):
+                kwargs = {"lang": self.tesseract_language}
+                if self.tessdata_path:
+                    kwargs["path"] = self.tessdata_path
+                self._engines.put(tesserocr.PyTessBaseAPI(**kwargs))
+        return self._engines
+
+    def read_page(self, filepath: Path, page_number: int) -> str:
+        """Reads a single page of a PDF file."""
+        image = _rasterize_page(filepath, page_number, self.dpi, self.poppler_path)
+        engines = self._engine_pool()
+        engine = engines.get()
+        try:
+            engine.SetImage(image)
+            text = engine.GetUTF8Text()
+        finally:
+            engines.put(engine)
+        return " ".join(text.strip().split())
+
+    def iter_pages(self, filepath: Path) -> Iterator[tuple[int, str]]:
+        page_count = pdfinfo_from_path(filepath, poppler_path=self.poppler_path)[
+            "Pages"
         ]
+        page_numbers = range(1, page_count + 1)
+        if self.workers <= 1:
+            for page_number in page_numbers:
+                yield page_number, self.read_page(filepath, page_number)
+            return
+        # tesserocr releases the GIL while recognizing, so threads are enough to
+        # keep all engines busy.
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = deque()
+            for page_number in page_numbers:
+                future = executor.submit(self.read_page, filepath, page_number)
+                in_flight.append((page_number, future))
+                if len(in_flight) >= self.workers:
+                    done_page_number, done_future = in_flight.popleft()
+                    yield done_page_number, done_future.result()
+            for page_number, future in in_flight:
+                yield page_number, future.result()
+
+    def read(self, filepath: Path) -> list[str]:
+        return [text for _, text in self.iter_pages(filepath)]
+
+    def close(self) -> None:
+        """Shuts down the Tesseract engines."""
+        if self._engines is not None:
+            while not self._engines.empty():
+                self._engines.get().End()
+            self._engines = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_engines"] = None
+        return state
 
     def __repr__(self):
-        return f"benkpress.api.reader.TesseractReader(tesseract_language={self.tesseract_language}, dpi={self.dpi})"
+        return f"benkpress.api.reader.TesserocrReader(tesseract_language={self.tesseract_language}, dpi={self.dpi})"
 
 
 class PyPDFReader:
     """A reader that uses PyPDF2 to read PDF files. Fast but not very precise. Mostly used for testing."""
 
-    def read(self, filepath: Path) -> list[str]:
+    SETTINGS = ()
+
+    @classmethod
+    def from_settings(cls, settings: ReaderSettings) -> PyPDFReader:
+        return cls()
+
+    def iter_pages(self, filepath: Path) -> Iterator[tuple[int, str]]:
         with filepath.open("rb") as f:
             pdf = PdfFileReader(f)
-            return [
-                " ".join(pdf.getPage(i).extractText().strip().split())
-                for i in range(pdf.getNumPages())
-            ]
+            for i in range(pdf.getNumPages()):
+                yield i + 1, " ".join(pdf.getPage(i).extractText().strip().split())
+
+    def read(self, filepath: Path) -> list[str]:
+        return [text for _, text in self.iter_pages(filepath)]
 
     def __repr__(self):
         return "benkpress.api.reader.PyPDFReader()"
+
+
+class HybridReader:
+    """A reader that uses the text layer of a PDF file where there is one, and falls
+    back to Tesseract OCR for pages where there is not. Almost as fast as PyPDFReader
+    on born-digital documents, and almost as precise as TesseractReader on scans.
+
+    A page is OCR:ed if its text layer has fewer than `min_characters` characters, or
+    if fewer than `min_alnum_ratio` of those characters are alphanumeric, which is
+    typical for garbled text layers.
+    """
+
+    SETTINGS = ("dpi", "language", "poppler_path", "tesseract_path")
+
+    @classmethod
+    def from_settings(cls, settings: ReaderSettings) -> HybridReader:
+        return cls(
+            poppler_path=settings.poppler_path,
+            tesseract_path=settings.tesseract_path,
+            tesseract_language=settings.language,
+            dpi=settings.dpi,
+        )
+
+    def __init__(
+        self,
+        poppler_path: str,
+        tesseract_path: str,
+        tesseract_language: str,
+        dpi: int = 100,
+        min_characters: int = 20,
+        min_alnum_ratio: float = 0.5,
+    ):
+        self._text_layer_reader = PyPDFReader()
+        self._ocr_reader = TesseractReader(
+            poppler_path=poppler_path,
+            tesseract_path=tesseract_path,
+            tesseract_language=tesseract_language,
+            dpi=dpi,
+        )
+        self.min_characters = min_characters
+        self.min_alnum_ratio = min_alnum_ratio
+        self.text_layer_pages = 0
+        self.ocr_pages = 0
+        # Guards the page counts, since documents may be read in several threads.
+        self._counts_lock = threading.Lock()
+
+    def _has_usable_text_layer(self, text: str) -> bool:
+        characters = text.replace(" ", "")
+        if len(characters) < self.min_characters:
+            return False
+        alnum_characters = sum(c.isalnum() for c in characters)
+        return alnum_characters / len(characters) >= self.min_alnum_ratio
+
+    def iter_pages(self, filepath: Path) -> Iterator[tuple[int, str]]:
+        text_layer_pages = 0
+        ocr_pages = 0
+        for page_number, text in self._text_layer_reader.iter_pages(filepath):
+            if self._has_usable_text_layer(text):
+                text_layer_pages += 1
+            else:
+                text = self._ocr_reader.read_page(filepath, page_number)
+                ocr_pages += 1
+            yield page_number, text
+        with self._counts_lock:
+            self.text_layer_pages += text_layer_pages
+            self.ocr_pages += ocr_pages
+            total_text_layer_pages = self.text_layer_pages
+            total_ocr_pages = self.ocr_pages
+        logger.info(
+            f"Read {filepath} using the text layer for {text_layer_pages} pages "
+            f"and OCR for {ocr_pages} pages (totals: {total_text_layer_pages} "
+            f"and {total_ocr_pages})"
+        )
+
+    def read(self, filepath: Path) -> list[str]:
+        return [text for _, text in self.iter_pages(filepath)]
+
+    def statistics(self) -> dict[str, int]:
+        """The page counts, so that the counts of a copy of the reader that read
+        documents in another process can be added to them."""
+        with self._counts_lock:
+            return {
+                "text_layer_pages": self.text_layer_pages,
+                "ocr_pages": self.ocr_pages,
+            }
+
+    def add_statistics(self, statistics: dict[str, int]) -> None:
+        with self._counts_lock:
+            self.text_layer_pages += statistics.get("text_layer_pages", 0)
+            self.ocr_pages += statistics.get("ocr_pages", 0)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_counts_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._counts_lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            "benkpress.api.reader.HybridReader("
+            f"tesseract_language={self._ocr_reader.tesseract_language}, "
+            f"dpi={self._ocr_reader.dpi}, "
+            f"min_characters={self.min_characters}, "
+            f"min_alnum_ratio={self.min_alnum_ratio})"
+        )
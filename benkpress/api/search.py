@@ -0,0 +1,104 @@
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""benkpress.api.search
+
+Full-text search over the texts of a dataset.
+"""
+
+import re
+from collections import defaultdict
+from typing import Iterable
+
+import numpy as np
+
+_TERM_PATTERN = re.compile(r"\w+")
+
+
+def terms(text: str) -> set[str]:
+    """Split a text into its distinct, lowercased search terms."""
+    return set(_TERM_PATTERN.findall(str(text).lower()))
+
+
+class _Postings:
+    """The ascending rows in which a term occurs, in an array with spare capacity
+    that doubles whenever it runs out."""
+
+    def __init__(self):
+        self._rows = np.empty(4, dtype=np.int64)
+        self._size = 0
+
+    def extend(self, rows: list[int]) -> None:
+        size = self._size + len(rows)
+        if size > len(self._rows):
+            grown = np.empty(max(size, 2 * len(self._rows)), dtype=np.int64)
+            grown[: self._size] = self._rows[: self._size]
+            self._rows = grown
+        self._rows[self._size : size] = rows
+        self._size = size
+
+    def rows(self) -> np.ndarray:
+        return self._rows[: self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class InvertedIndex:
+    """An inverted index from search terms to the rows whose texts contain them.
+
+    Rows are added in ascending order, e.g. as they are appended to a dataset, so
+    that the rows of each term stay sorted and queries only intersect sorted arrays.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, _Postings] = {}
+        self._row_count = 0
+
+    @property
+    def row_count(self) -> int:
+        """The number of rows added to the index."""
+        return self._row_count
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Add the texts of the next rows to the index."""
+        new_postings: dict[str, list[int]] = defaultdict(list)
+        row_count = self._row_count
+        for text in texts:
+            for term in terms(text):
+                new_postings[term].append(row_count)
+            row_count += 1
+        for term, rows in new_postings.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+            postings.extend(rows)
+        self._row_count = row_count
+
+    def query(self, query: str) -> np.ndarray:
+        """Return the ascending rows whose texts contain all terms of the query."""
+        query_terms = terms(query)
+        if not query_terms:
+            return np.arange(self._row_count)
+        postings = [self._postings.get(term) for term in query_terms]
+        if any(p is None for p in postings):
+            return np.empty(0, dtype=np.int64)
+        # Intersect the rarest terms first, so that intermediate results stay small.
+        postings.sort(key=len)
+        rows = postings[0].rows()
+        for p in postings[1:]:
+            rows = np.intersect1d(rows, p.rows(), assume_unique=True)
+        return rows
@@ -0,0 +1,179 @@
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""benkpress.api.store
+
+On-disk store of preprocessed page and sentence texts, as written by
+benkpress-preprocess, and readers and sentencizers backed by it.
+"""
+
+import json
+import sqlite3
+import threading
+from hashlib import sha1
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from benkpress.api.tokenizer import Sentencizer
+
+
+def _text_digest(text: str) -> str:
+    return sha1(text.encode()).hexdigest()
+
+
+class PageTextStore:
+    """A compact SQLite store of the texts of the pages kept by a page filter, and of
+    the sentences of those pages, per file of a sample. Also records the settings the
+    store was made with. The store is safe to use from multiple threads."""
+
+    SUFFIX = ".bkstore"
+
+    def __init__(self, path: Path):
+        """Open or create a store at the given path."""
+        self._path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+                "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY);"
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "path TEXT, page INTEGER, text TEXT, PRIMARY KEY (path, page));"
+                "CREATE TABLE IF NOT EXISTS sentences ("
+                "digest TEXT PRIMARY KEY, sentences TEXT);"
+            )
+
+    @classmethod
+    def is_store(cls, path: Path) -> bool:
+        """Whether the given path refers to an existing store."""
+        return path.suffix == cls.SUFFIX and path.is_file()
+
+    def set_meta(self, meta: dict[str, str]) -> None:
+        """Record the settings the store was made with."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)", meta.items()
+            )
+
+    def meta(self) -> dict[str, str]:
+        """The settings the store was made with."""
+        with self._lock:
+            return dict(self._connection.execute("SELECT key, value FROM meta"))
+
+    def add_document(
+        self,
+        filepath: str,
+        pages: list[tuple[int, str]],
+        sentences: Optional[list[list[str]]] = None,
+    ) -> None:
+        """Store the kept `(page_number, text)` pairs of a file, and optionally the
+        sentences of each of those pages."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?)", (filepath,)
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                [(filepath, page_number, text) for page_number, text in pages],
+            )
+            if sentences is not None:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO sentences VALUES (?, ?)",
+                    [
+                        (_text_digest(text), json.dumps(page_sentences))
+                        for (_, text), page_sentences in zip(pages, sentences)
+                    ],
+                )
+
+    def file_paths(self) -> list[str]:
+        """The paths of all stored files."""
+        with self._lock:
+            return [
+                row[0] for row in self._connection.execute("SELECT path FROM files")
+            ]
+
+    def pages(self, filepath: str) -> list[tuple[int, str]]:
+        """The stored `(page_number, text)` pairs of a file."""
+        with self._lock:
+            return list(
+                self._connection.execute(
+                    "SELECT page, text FROM pages WHERE path = ? ORDER BY page",
+                    (filepath,),
+                )
+            )
+
+    def sentences(self, text: str) -> Optional[list[str]]:
+        """The stored sentences of a page text, or None if there are none."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT sentences FROM sentences WHERE digest = ?",
+                (_text_digest(text),),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def __repr__(self):
+        return f"benkpress.api.store.PageTextStore({self._path})"
+
+
+class StoreReader:
+    """A reader that reads preprocessed pages from a store instead of the PDF file.
+    Only the pages that were kept when the store was made are returned."""
+
+    def __init__(self, store: PageTextStore):
+        self._store = store
+
+    def iter_pages(self, filepath: Path) -> Iterator[tuple[int, str]]:
+        yield from self._store.pages(str(filepath))
+
+    def read(self, filepath: Path) -> list[str]:
+        return [text for _, text in self.iter_pages(filepath)]
+
+    def __repr__(self):
+        return f"benkpress.api.store.StoreReader({self._store!r})"
+
+
+class StoreSentencizer:
+    """A sentencizer that looks up preprocessed sentences in a store, and falls back
+    to a regular sentencizer for texts that are not in it."""
+
+    def __init__(self, store: PageTextStore, fallback: Sentencizer):
+        self._store = store
+        self._fallback = fallback
+
+    def sentencize(self, text: str) -> list[str]:
+        sentences = self._store.sentences(text)
+        if sentences is None:
+            sentences = self._fallback.sentencize(text)
+        return sentences
+
+    def sentencize_many(
+        self, texts: Iterable[str], batch_size: int = 64, n_process: int = 1
+    ) -> list[list[str]]:
+        texts = list(texts)
+        sentences = [self._store.sentences(text) for text in texts]
+        missing = [i for i, x in enumerate(sentences) if x is None]
+        if missing:
+            found = self._fallback.sentencize_many(
+                [texts[i] for i in missing], batch_size, n_process
+            )
+            for i, x in zip(missing, found):
+                sentences[i] = x
+        return sentences
+
+    def __repr__(self):
+        return (
+            f"benkpress.api.store.StoreSentencizer({self._store!r}, {self._fallback!r})"
+        )
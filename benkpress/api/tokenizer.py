@@ -14,9 +14,69 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-"""NLP operations for the benkpress application and dependent programs."""
+"""NLP operations for the benkpress application and dependent programs.
+
+Language models are loaded on first use, through a process-wide registry, so that
+all tokenizers of the same model share a single loaded `Language` object. Each
+tokenizer disables the components it does not need when it runs the model.
+"""
+
+import threading
+from typing import Iterable
 
 import spacy
+from sklearn.base import BaseEstimator, TransformerMixin
+from spacy.language import Language
+
+# Pipeline components that do not contribute to sentence boundaries and thus are
+# not run by the Sentencizer.
+_NON_SENTENCE_COMPONENTS = {
+    "tagger",
+    "morphologizer",
+    "attribute_ruler",
+    "lemmatizer",
+    "trainable_lemmatizer",
+    "ner",
+    "entity_ruler",
+}
+
+# Pipeline components that do not contribute to lemmas and thus are not run by the
+# Lemmatizer and the LemmatizingTransformer.
+_NON_LEMMA_COMPONENTS = {"parser", "senter", "sentencizer", "ner", "entity_ruler"}
+
+_languages: dict[str, Language] = {}
+_languages_lock = threading.Lock()
+
+
+def load_language(spacy_model: str) -> Language:
+    """Load a language model, or return the already loaded instance of it.
+
+    The dedicated sentence recognizer ("senter") is enabled if the model has one,
+    since it is faster than the parser for sentence boundaries. If the model has
+    neither, a rule-based sentencizer is added.
+    """
+    with _languages_lock:
+        if spacy_model not in _languages:
+            nlp = spacy.load(spacy_model)
+            if "senter" in nlp.disabled:
+                nlp.enable_pipe("senter")
+            elif not nlp.has_pipe("parser") and not nlp.has_pipe("senter"):
+                nlp.add_pipe("sentencizer")
+            _languages[spacy_model] = nlp
+        return _languages[spacy_model]
+
+
+def _sentence_disabled_components(nlp: Language) -> list[str]:
+    """Components to disable when only sentence boundaries are needed."""
+    unneeded = set(_NON_SENTENCE_COMPONENTS)
+    if nlp.has_pipe("senter"):
+        unneeded.add("parser")
+    return [name for name in nlp.pipe_names if name in unneeded]
+
+
+def _lemma_disabled_components(nlp: Language) -> list[str]:
+    """Components to disable when only lemmas are needed."""
+    return [name for name in nlp.pipe_names if name in _NON_LEMMA_COMPONENTS]
 
 
 class Lemmatizer:
@@ -26,29 +86,88 @@ class Lemmatizer:
     def __init__(self, spacy_model: str):
         """Initialize a lemmatizer for a specific language model."""
         self._spacy_model = spacy_model
-        self._nlp = spacy.load(spacy_model)
 
     def lemmatize(self, text: str) -> list[str]:
         """Lemmatize a string."""
-        return [x.lemma_ for x in self._nlp(text)]
+        nlp = load_language(self._spacy_model)
+        return [x.lemma_ for x in nlp(text, disable=_lemma_disabled_components(nlp))]
 
     def __repr__(self):
         """Return an unambiguous string representation of the lemmatizer."""
         return f"benkpress.api.tokenizer.Lemmatizer({self._spacy_model})"
 
 
+class LemmatizingTransformer(BaseEstimator, TransformerMixin):
+    """A sklearn compatible transformer that turns each text into a list of lemmas,
+    e.g. for use before a vectorizer with a passthrough analyzer. Unlike passing
+    `Lemmatizer.lemmatize` as the tokenizer of a vectorizer, all texts are processed
+    in batches through `nlp.pipe`, optionally using several processes, and only the
+    components needed for lemmas are run.
+    """
+
+    def __init__(
+        self,
+        spacy_model: str,
+        lowercase: bool = True,
+        batch_size: int = 256,
+        n_process: int = 1,
+    ):
+        """Initialize a lemmatizing transformer for a specific language model."""
+        self.spacy_model = spacy_model
+        self.lowercase = lowercase
+        self.batch_size = batch_size
+        self.n_process = n_process
+
+    def fit(self, X, y=None):
+        """Do nothing, the transformer is stateless."""
+        return self
+
+    def transform(self, X) -> list[list[str]]:
+        """Lemmatize each text of X."""
+        nlp = load_language(self.spacy_model)
+        texts = (str(x).lower() if self.lowercase else str(x) for x in X)
+        return [
+            [token.lemma_ for token in doc]
+            for doc in nlp.pipe(
+                texts,
+                batch_size=self.batch_size,
+                n_process=self.n_process,
+                disable=_lemma_disabled_components(nlp),
+            )
+        ]
+
+
 class Sentencizer:
     """A sentence splitting tokenizer for a specific language model. Used
-    by benkpress and dependent programs to split page text into sentence targets."""
+    by benkpress and dependent programs to split page text into sentence targets.
+
+    Only the components needed for sentence boundaries are run."""
 
     def __init__(self, spacy_model: str):
         """Initialize a sentencizer for a specific language model."""
         self._spacy_model = spacy_model
-        self._nlp = spacy.load(spacy_model)
 
     def sentencize(self, text: str) -> list[str]:
         """Split a string into sentences."""
-        return [x.text for x in self._nlp(text).sents]
+        nlp = load_language(self._spacy_model)
+        doc = nlp(text, disable=_sentence_disabled_components(nlp))
+        return [x.text for x in doc.sents]
+
+    def sentencize_many(
+        self, texts: Iterable[str], batch_size: int = 64, n_process: int = 1
+    ) -> list[list[str]]:
+        """Split several strings into sentences in batches, optionally using several
+        processes. Much faster than calling `sentencize` once per string."""
+        nlp = load_language(self._spacy_model)
+        return [
+            [x.text for x in doc.sents]
+            for doc in nlp.pipe(
+                texts,
+                batch_size=batch_size,
+                n_process=n_process,
+                disable=_sentence_disabled_components(nlp),
+            )
+        ]
 
     def __repr__(self):
         """Return an unambiguous string representation of the sentencizer."""
@@ -0,0 +1,203 @@
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""benkpress.api.watchdog
+
+Reading of documents within a time and page budget.
+"""
+
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from benkpress.api.cancellation import CancellationToken
+from benkpress.api.reader import Reader, iter_pages, process_context
+
+logger = logging.getLogger(__name__)
+
+# How often, in seconds, to check for cancellation while waiting for a page.
+_CANCELLATION_POLL_INTERVAL = 0.1
+
+
+class DocumentBudgetExceeded(Exception):
+    """Raised when reading a document exceeds its time or page budget, or when the
+    reader process dies while reading it."""
+
+
+class _PipeQueue:
+    """The queue of a `logging.handlers.QueueHandler` that sends the log records of
+    the reader process through the pipe, to be handled by the parent process."""
+
+    def __init__(self, connection: Connection):
+        self._connection = connection
+
+    def put_nowait(self, record: logging.LogRecord) -> None:
+        self._connection.send(("log", record))
+
+
+def _statistics(reader: Reader) -> dict[str, int]:
+    # Readers may keep statistics, such as page counts, that are accumulated in the
+    # reader process and have to be added to the reader of the parent process.
+    return reader.statistics() if hasattr(reader, "statistics") else {}
+
+
+def _read_into_pipe(
+    reader: Reader, filepath: Path, connection: Connection, log_level: int
+) -> None:
+    """Read the pages of a document and send them through a pipe, one at a time,
+    along with the log records of the reader, and finally the statistics of the
+    reader for the document. Runs in the reader process."""
+    if hasattr(os, "setpgrp"):
+        # Lead a process group of our own, so that OCR subprocesses and worker
+        # processes of the reader are killed along with us.
+        os.setpgrp()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(log_level)
+    root_logger.addHandler(logging.handlers.QueueHandler(_PipeQueue(connection)))
+    statistics = _statistics(reader)
+    try:
+        for page in iter_pages(reader, filepath):
+            connection.send(("page", page))
+        statistics = {
+            key: value - statistics.get(key, 0)
+            for key, value in _statistics(reader).items()
+        }
+        connection.send(("done", statistics))
+    except Exception as e:
+        connection.send(("error", repr(e)))
+    finally:
+        connection.close()
+
+
+def _kill(process: multiprocessing.Process) -> None:
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    process.kill()
+    process.join()
+
+
+def _poll_interval(
+    deadline: Optional[float], timeout: float, token: Optional[CancellationToken]
+) -> Optional[float]:
+    """Return how long to wait for a message from the reader process before checking
+    the budget and the token again, or None to wait for as long as it takes. Raises
+    `DocumentBudgetExceeded` if the time budget is spent."""
+    wait = None if token is None else _CANCELLATION_POLL_INTERVAL
+    if deadline is None:
+        return wait
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DocumentBudgetExceeded(f"Reading took longer than {timeout:g} s")
+    return remaining if wait is None else min(wait, remaining)
+
+
+def _receive(
+    receiver: Connection,
+    deadline: Optional[float],
+    timeout: float,
+    token: Optional[CancellationToken],
+) -> tuple[str, Any]:
+    """Wait for the next message from the reader process but log records, which are
+    handled as they arrive."""
+    while True:
+        kind, payload = _receive_message(receiver, deadline, timeout, token)
+        if kind != "log":
+            return kind, payload
+        logging.getLogger(payload.name).handle(payload)
+
+
+def _receive_message(
+    receiver: Connection,
+    deadline: Optional[float],
+    timeout: float,
+    token: Optional[CancellationToken],
+) -> tuple[str, Any]:
+    """Wait for the next message from the reader process, checking the time budget
+    and the token while waiting."""
+    while True:
+        if token is not None:
+            token.raise_if_cancelled()
+        wait = _poll_interval(deadline, timeout, token)
+        if wait is None or receiver.poll(wait):
+            break
+    try:
+        return receiver.recv()
+    except EOFError:
+        raise DocumentBudgetExceeded("The reader process died") from None
+
+
+def _unpack(reader: Reader, message: tuple[str, Any]) -> Optional[tuple[int, str]]:
+    """Return the page of a message from the reader process, or None once the whole
+    document has been read, after adding the statistics of the reader process to
+    the reader. Raises if the reader failed."""
+    kind, payload = message
+    if kind == "error":
+        raise RuntimeError(f"The reader failed: {payload}")
+    if kind == "done":
+        if payload:
+            reader.add_statistics(payload)
+        return None
+    return payload
+
+
+def read_pages_with_budget(
+    reader: Reader,
+    filepath: Path,
+    timeout: float = 0,
+    max_pages: int = 0,
+    token: Optional[CancellationToken] = None,
+) -> Iterator[tuple[int, str]]:
+    """Lazily read the pages of a document in a separate, killable process.
+
+    The process is killed and `DocumentBudgetExceeded` is raised if reading the
+    whole document takes more than `timeout` seconds, or if the document has more
+    than `max_pages` pages. A budget of zero is unlimited. If the given token is
+    cancelled, the process is killed and `Cancelled` is raised, also in the middle
+    of a page. The reader must be picklable."""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = process_context().Process(
+        target=_read_into_pipe,
+        args=(reader, filepath, sender, logging.getLogger().getEffectiveLevel()),
+        name=f"benkpress-reader-{filepath.name}",
+    )
+    process.start()
+    sender.close()
+    deadline = time.monotonic() + timeout if timeout else None
+    page_count = 0
+    try:
+        while True:
+            page = _unpack(reader, _receive(receiver, deadline, timeout, token))
+            if page is None:
+                break
+            page_count += 1
+            if max_pages and page_count > max_pages:
+                raise DocumentBudgetExceeded(f"More than {max_pages} pages")
+            yield page
+    finally:
+        receiver.close()
+        if process.is_alive():
+            _kill(process)
+        else:
+            process.join()
@@ -19,18 +19,29 @@
 import io
 import logging
 import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
-from typing import List
+from typing import Callable, Iterator, List
 
+import numpy as np
 import PyQt6.QtWidgets as qtw
 from PyQt6 import QtCore as qtc
 from PyQt6 import QtWidgets as qtw
+from sklearn.base import clone
 from sklearn.exceptions import NotFittedError
 from sklearn.metrics import auc, classification_report, confusion_matrix, roc_curve
 from sklearn.model_selection import KFold
+from sklearn.pipeline import Pipeline
 
+from benkpress.api.cancellation import CancellationToken, Cancelled
+from benkpress.api.dataset import FILE_DIALOG_FILTER
 from benkpress.api.hash import filename_digest
-from benkpress.datamodel import DataframeTableModel, Session
+from benkpress.api.journal import DatasetJournal
+from benkpress.api.reader import iter_pages
+from benkpress.api.watchdog import DocumentBudgetExceeded, read_pages_with_budget
+from benkpress.datamodel import DataframeTableModel, DatasetFilterProxyModel, Session
 from benkpress.plugin import PluginLoader
 from benkpress.resources import QUICK_START_GUIDE_PATH
 from benkpress.ui.mainwindow import Ui_MainWindow
@@ -40,71 +51,251 @@ logger = logging.getLogger(__name__)
 
 
 class DocumentProcessor(qtc.QObject):
-    """A worker object that can be used to process documents in a separate thread."""
+    """A worker object that can be used to process documents in a separate thread.
+
+    Up to `Session.prefetch_depth` documents from the sample are processed ahead of
+    time, concurrently, in a pool of worker threads. Processed documents are still
+    delivered in sample order, one per call to `process_next_document`. Documents
+    that exceed the document budget of the session, or that otherwise fail, are
+    quarantined through the document_quarantined signal instead.
+
+    Documents are scored with the pipeline of the session as it is when they reach
+    that stage. Refitting replaces the pipeline rather than fitting it in place, so
+    documents that were scored with a replaced pipeline are scored again with the
+    current one when they are delivered.
+
+    Setting a new session cancels the documents in flight for the previous one. The
+    worker threads check for cancellation between pages and between stages. Every
+    session is processed under the generation id it was set with, which is passed
+    along with every processed document, so that stale results can be discarded.
+    """
 
     processing_started = qtc.pyqtSignal(Path)
-    next_document_processed = qtc.pyqtSignal(list, Path)
+    next_document_processed = qtc.pyqtSignal(list, Path, int)
+    prefetch_status_changed = qtc.pyqtSignal(int, int)
+    stage_timed = qtc.pyqtSignal(str, float)
+    document_quarantined = qtc.pyqtSignal(Path, str)
+    # Emitted from the worker threads whenever a document has been processed.
+    _document_finished = qtc.pyqtSignal()
 
-    @qtc.pyqtSlot(Session)
-    def set_session(self, session: Session):
-        """Set the session to use for processing documents."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = None
+        self._executor: ThreadPoolExecutor = None
+        self._pending: deque[tuple[Path, Future]] = deque()
+        self._requested = 0
+        self._generation = 0
+        self._token = CancellationToken()
+        self._document_finished.connect(self._deliver_documents)
+
+    def cancel(self):
+        """Cancel the documents in flight. Safe to call from any thread, so that
+        the worker threads can be freed before the new session arrives."""
+        self._token.cancel()
+
+    @qtc.pyqtSlot(Session, int)
+    def set_session(self, session: Session, generation: int):
+        """Set the session to use for processing documents, under the given
+        generation id."""
         # Treat the session as immutable!
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
         self.session = session
+        self._generation = generation
+        self._token = CancellationToken()
+        session.timings.add_listener(
+            lambda span: self.stage_timed.emit(span.stage, span.duration)
+        )
+        self._executor = ThreadPoolExecutor(max_workers=session.prefetch_depth)
+        self._pending.clear()
+        self._requested = 0
+        self._emit_prefetch_status()
 
     @qtc.pyqtSlot()
     def process_next_document(self):
-        """Run the task in a separate thread."""
-        if (
-            not self.session.sample.rowCount()
-        ):  # TODO: The name of the method called here should be more informative.
+        """Request the next processed document. It is delivered through the
+        next_document_processed signal once it is ready."""
+        self._requested += 1
+        self._prefetch_documents()
+        self._deliver_documents()
+
+    def _prefetch_documents(self):
+        """Start processing documents until the look-ahead depth is reached."""
+        # TODO: The name of the method called here should be more informative.
+        while (
+            len(self._pending) < self.session.prefetch_depth
+            and self.session.sample.rowCount()
+        ):
+            documentpath = Path(self.session.sample.pop())
+            future = self._executor.submit(
+                self._process_document, self.session, documentpath, self._token
+            )
+            future.add_done_callback(lambda _: self._document_finished.emit())
+            self._pending.append((documentpath, future))
+        self._emit_prefetch_status()
+
+    @qtc.pyqtSlot()
+    def _deliver_documents(self):
+        """Deliver processed documents in sample order, as far as requested.
+        Documents that could not be processed are quarantined and skipped."""
+        while self._requested and self._pending and self._pending[0][1].done():
+            self._deliver_document(*self._pending.popleft())
+            self._prefetch_documents()
+        self._emit_prefetch_status()
+
+    def _deliver_document(self, documentpath: Path, future: Future):
+        """Deliver a processed document, or quarantine it if it failed."""
+        try:
+            rows, pipeline = future.result()
+        except Cancelled:
+            logger.debug(f"Cancelled processing of document: {documentpath}")
+        except DocumentBudgetExceeded as e:
+            logger.warning(f"Quarantined document: {documentpath}: {e}")
+            self.document_quarantined.emit(documentpath, str(e))
+        except Exception as e:
+            logger.exception(f"Failed to process document: {documentpath}")
+            self.document_quarantined.emit(documentpath, repr(e))
+        else:
+            if pipeline is not self.session.pipeline:
+                rows = self._rescore(rows)
+            self._requested -= 1
+            self.next_document_processed.emit(rows, documentpath, self._generation)
+
+    def _rescore(
+        self, rows: list[DataframeTableModel.RowConfig]
+    ) -> list[DataframeTableModel.RowConfig]:
+        """Score rows again with the current pipeline of the session."""
+        pipeline = self.session.pipeline
+        with self.session.timings.span("rescore"):
+            probas, classes = self._predict(pipeline, [row.text for row in rows])
+        return [
+            replace(row, proba=proba, class_=class_)
+            for row, proba, class_ in zip(rows, probas, classes)
+        ]
+
+    def _emit_prefetch_status(self):
+        in_flight = sum(not future.done() for _, future in self._pending)
+        self.prefetch_status_changed.emit(self.session.prefetch_depth, in_flight)
+
+    def _read_pages(
+        self, session: Session, documentpath: Path, token: CancellationToken
+    ) -> Iterator[tuple[int, str]]:
+        """Lazily read the pages of a document, using the page cache if available."""
+        reader = session.reader
+        page_cache = session.page_cache
+        if page_cache is None:
+            yield from self._read_pages_within_budget(session, documentpath, token)
             return
+        cached_pages = page_cache.get(reader, documentpath)
+        if cached_pages is not None:
+            yield from cached_pages
+            return
+        read_pages = []
+        for page_number, page_text in self._read_pages_within_budget(
+            session, documentpath, token
+        ):
+            read_pages.append((page_number, page_text))
+            yield page_number, page_text
+        page_cache.put(reader, documentpath, read_pages)
+
+    def _read_pages_within_budget(
+        self, session: Session, documentpath: Path, token: CancellationToken
+    ) -> Iterator[tuple[int, str]]:
+        """Lazily read the pages of a document with the reader of the session. If
+        the session has a document budget, the reader runs in a killable process."""
+        if not (session.document_timeout or session.max_pages):
+            for page in iter_pages(session.reader, documentpath):
+                token.raise_if_cancelled()
+                yield page
+            return
+        yield from read_pages_with_budget(
+            session.reader,
+            documentpath,
+            session.document_timeout,
+            session.max_pages,
+            token,
+        )
+
+    def _process_document(
+        self, session: Session, documentpath: Path, token: CancellationToken
+    ) -> tuple[list[DataframeTableModel.RowConfig], Pipeline]:
+        """Read, filter and score a document. Runs in a worker thread. Returns the
+        rows of the document and the pipeline that scored them."""
+        token.raise_if_cancelled()
+        with session.timings.span("document"):
+            return self._process_document_stages(session, documentpath, token)
+
+    def _process_document_stages(
+        self, session: Session, documentpath: Path, token: CancellationToken
+    ) -> tuple[list[DataframeTableModel.RowConfig], Pipeline]:
+        timings = session.timings
 
         # Step 1: Read
-        documentpath = Path(self.session.sample.pop())
         logger.debug(f"Processing next document: {documentpath}")
         self.processing_started.emit(documentpath)
-        read_pages = self.session.reader.read(documentpath)
         file_id = filename_digest(documentpath)
-        filtered_pages = []
+        with timings.span("read"):
+            read_pages = list(self._read_pages(session, documentpath, token))
 
-        # Step 2: Filter pages
-        for i, page_text in enumerate(read_pages):
-            if self.session.page_filter.predict([page_text])[0]:
-                page_number = i + 1
-                filtered_pages.append((page_number, page_text))
+        # Step 2: Filter pages, all in one call
+        token.raise_if_cancelled()
+        filtered_pages = []
+        if read_pages:
+            with timings.span("page_filter"):
+                keep = session.page_filter.predict([text for _, text in read_pages])
+            filtered_pages = [page for page, kept in zip(read_pages, keep) if kept]
 
         # Step 3: Preprocess documents
-        if self.session.target == Session.Target.FILE:
+        token.raise_if_cancelled()
+        if session.target == Session.Target.FILE:
             filtered_documents = [
                 (0, " ".join([page_text for _, page_text in filtered_pages]))
             ]
-        elif self.session.target == Session.Target.SENTENCE:
+        elif session.target == Session.Target.SENTENCE:
+            with timings.span("sentencize"):
+                sentences_per_page = session.sentencizer.sentencize_many(
+                    [page_text for _, page_text in filtered_pages]
+                )
             filtered_documents = [
                 (page_number, sentence)
-                for page_number, page_text in filtered_pages
-                for sentence in self.session.sentencizer.sentencize(page_text)
+                for (page_number, _), sentences in zip(
+                    filtered_pages, sentences_per_page
+                )
+                for sentence in sentences
             ]
         else:  # Session.Target.PAGE
             filtered_documents = filtered_pages
 
-        rows = []
-
-        # Step 4: Predict and add to dataset
-        for page_number, document_text in filtered_documents:
-            try:
-                if not self.session.pipeline:
-                    raise NotFittedError
-                proba = self.session.pipeline.predict_proba([document_text])[0][1]
-                class_ = self.session.pipeline.predict([document_text])[0]
-            except NotFittedError:
-                proba = 0.0
-                class_ = 0
-            rows.append(
-                DataframeTableModel.RowConfig(
-                    file_id, page_number, document_text, proba, class_
-                )
+        # Step 4: Predict, all in one call, and add to dataset
+        token.raise_if_cancelled()
+        texts = [document_text for _, document_text in filtered_documents]
+        pipeline = session.pipeline
+        with timings.span("predict"):
+            probas, classes = self._predict(pipeline, texts)
+        rows = [
+            DataframeTableModel.RowConfig(
+                file_id, page_number, document_text, proba, class_
             )
-        self.next_document_processed.emit(rows, documentpath)
+            for (page_number, document_text), proba, class_ in zip(
+                filtered_documents, probas, classes
+            )
+        ]
+        return rows, pipeline
+
+    def _predict(self, pipeline: Pipeline, texts: list[str]) -> tuple[list, list]:
+        """Predict the positive class probability and the class of each text, with a
+        single vectorize and classify pass. Unfitted pipelines predict class 0."""
+        if not texts:
+            return [], []
+        try:
+            if not pipeline:
+                raise NotFittedError
+            probas = pipeline.predict_proba(texts)
+        except NotFittedError:
+            return [0.0] * len(texts), [0] * len(texts)
+        classes = pipeline.classes_[np.argmax(probas, axis=1)]
+        return list(probas[:, 1]), list(classes)
 
 
 class MainWindow(qtw.QMainWindow):
@@ -113,7 +304,7 @@ class MainWindow(qtw.QMainWindow):
     new_session_requested = qtc.pyqtSignal()
     save_dataset_requested = qtc.pyqtSignal(Session)
     next_document_requested = qtc.pyqtSignal()
-    session_changed = qtc.pyqtSignal(Session)
+    session_changed = qtc.pyqtSignal(Session, int)
     quit_requested = qtc.pyqtSignal()
     session: Session = None
 
@@ -121,6 +312,12 @@ class MainWindow(qtw.QMainWindow):
         super().__init__(*args, **kwargs)
         self._next_document_cache: list[DataframeTableModel.RowConfig] = []
         self._next_document_path: Path = None
+        self._session_generation = 0
+        self._dataset_proxy = DatasetFilterProxyModel()
+        # Wait for a pause in typing before searching.
+        self._search_timer = qtc.QTimer()
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
         self._document_processor = DocumentProcessor()
         self._document_processing_thread = qtc.QThread()
         self._document_processor.moveToThread(self._document_processing_thread)
@@ -133,6 +330,10 @@ class MainWindow(qtw.QMainWindow):
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         self.ui.pdf_view.load(str(QUICK_START_GUIDE_PATH))
+        self._timings_label = qtw.QLabel()
+        self.ui.status_bar.addWidget(self._timings_label, 1)
+        self._prefetch_status_label = qtw.QLabel()
+        self.ui.status_bar.addPermanentWidget(self._prefetch_status_label)
 
     def _init_connections(self):
         """Initialize connections between signals and slots."""
@@ -153,18 +354,32 @@ class MainWindow(qtw.QMainWindow):
             self._document_processor.process_next_document
         )
         self._document_processor.next_document_processed.connect(
-            self.set_next_document_cache
+            self.receive_next_document
         )
-        self._document_processor.next_document_processed.connect(
-            self.activate_next_document_button
+
+        self._document_processor.prefetch_status_changed.connect(
+            self.update_prefetch_status_label
         )
-        self._document_processor.next_document_processed.connect(
-            self.activate_refit_pipeline_button
+        self._document_processor.stage_timed.connect(self.update_timings_label)
+        self._document_processor.document_quarantined.connect(
+            self.add_quarantined_document
         )
 
         self.session_changed.connect(self._document_processor.set_session)
         self.ui.refit_pipeline_button.clicked.connect(self.refit_pipeline)
 
+        self.ui.search_line_edit.textChanged.connect(self._search_timer.start)
+        self._search_timer.timeout.connect(self.filter_dataset)
+        for spin_box in (
+            self.ui.class_filter_spin_box,
+            self.ui.min_proba_spin_box,
+            self.ui.max_proba_spin_box,
+        ):
+            spin_box.valueChanged.connect(lambda _: self.filter_dataset())
+        self._dataset_proxy.rowsInserted.connect(self.update_dataset_size_label)
+        self._dataset_proxy.modelReset.connect(self.update_dataset_size_label)
+        self._dataset_proxy.indexing_progressed.connect(self.update_indexing_status)
+
     def closeEvent(self, event: qtc.QEvent):
         logger.debug("Close event triggered.")
         event.ignore()
@@ -176,7 +391,19 @@ class MainWindow(qtw.QMainWindow):
             return not self.session.dataset.is_saved()
         return False
 
-    @qtc.pyqtSlot(list, Path)
+    @qtc.pyqtSlot(list, Path, int)
+    def receive_next_document(
+        self, rows: list[DataframeTableModel.RowConfig], path: Path, generation: int
+    ):
+        """Receive the next processed document, unless it belongs to a previous
+        session."""
+        if generation != self._session_generation:
+            logger.debug(f"Discarded stale document: {path}")
+            return
+        self.set_next_document_cache(rows, path)
+        self.activate_next_document_button()
+        self.activate_refit_pipeline_button()
+
     def set_next_document_cache(
         self, rows: list[DataframeTableModel.RowConfig], path: Path
     ):
@@ -210,24 +437,84 @@ class MainWindow(qtw.QMainWindow):
 
     def set_session(self, session: Session):
         """Set the current session."""
+        # Free the document processor from the previous session right away, rather
+        # than when it gets around to handle the session change.
+        self._document_processor.cancel()
+        self._session_generation += 1
+        self.set_next_document_cache([], None)
         self.session = session
         self.ui.sample_list_view.setModel(self.session.sample)
-        self.ui.dataset_table_view.setModel(self.session.dataset)
+        self._dataset_proxy.setSourceModel(self.session.dataset)
+        self.ui.dataset_table_view.setModel(self._dataset_proxy)
+        self.ui.quarantine_list_widget.clear()
         self.session.dataset.rowsInserted.connect(self.update_dataset_size_label)
-        self.session_changed.emit(session)
+        self.filter_dataset()
+        self.session_changed.emit(session, self._session_generation)
         self.next_document_requested.emit()
 
     @qtc.pyqtSlot(bool)
     def load_document_from_cache(self, _):
-        for row in self._next_document_cache:
-            self.session.dataset.appendRow(row)
+        with self.session.timings.span("append_rows"):
+            self.session.dataset.appendRows(self._next_document_cache)
         self.ui.dataset_table_view.scrollToBottom()
         self.ui.pdf_view.load(str(self._next_document_path))
 
+    @qtc.pyqtSlot(int, int)
+    def update_prefetch_status_label(self, depth: int, in_flight: int):
+        """Update the status bar label that displays the look-ahead state."""
+        self._prefetch_status_label.setText(
+            f"Look-ahead depth: {depth}, in flight: {in_flight}"
+        )
+
+    @qtc.pyqtSlot(str, float)
+    def update_timings_label(self, stage: str, duration: float):
+        """Update the status bar label that displays the rolling timing summary."""
+        summary = self.session.timings.format_summary()
+        self._timings_label.setText(summary)
+        self._timings_label.setToolTip(summary.replace(" | ", "\n"))
+
+    @qtc.pyqtSlot(Path, str)
+    def add_quarantined_document(self, path: Path, reason: str):
+        """Add a document that was skipped to the quarantine list for review."""
+        item = qtw.QListWidgetItem(f"{path.name}: {reason}")
+        item.setToolTip(str(path))
+        self.ui.quarantine_list_widget.addItem(item)
+
     @qtc.pyqtSlot()
     def update_dataset_size_label(self):
-        """Update the label that displays the size of the dataset."""
-        self.ui.dataset_size_label.setText(f"{self.session.dataset.rowCount()}")
+        """Update the label that displays the size of the dataset, and how many of
+        its rows are shown if it is filtered."""
+        size = self.session.dataset.rowCount()
+        if self._dataset_proxy.is_filtered():
+            self.ui.dataset_size_label.setText(
+                f"{self._dataset_proxy.rowCount()} shown of {size}"
+            )
+        else:
+            self.ui.dataset_size_label.setText(f"{size}")
+
+    @qtc.pyqtSlot(int, int)
+    def update_indexing_status(self, indexed: int, total: int):
+        """Show the progress of building the search index in the status bar."""
+        if self._dataset_proxy.is_indexing():
+            self.ui.status_bar.showMessage(
+                f"Indexing texts for search: {indexed} of {total} rows"
+            )
+        else:
+            self.ui.status_bar.clearMessage()
+
+    @qtc.pyqtSlot()
+    def filter_dataset(self):
+        """Show only the rows of the dataset that match the search and filters."""
+        if self.session is None:
+            return
+        self._search_timer.stop()
+        class_ = self.ui.class_filter_spin_box.value()
+        self._dataset_proxy.set_filter(
+            self.ui.search_line_edit.text(),
+            None if class_ == self.ui.class_filter_spin_box.minimum() else class_,
+            self.ui.min_proba_spin_box.value(),
+            self.ui.max_proba_spin_box.value(),
+        )
 
     # TODO: The following private methods should be part of the
     # widget rather than the main window.
@@ -275,9 +562,12 @@ class MainWindow(qtw.QMainWindow):
                 X_test = X[test_indices]
                 y_test = y[test_indices]
 
-                self.session.pipeline.fit(X_train, y_train)
-                y_predict = self.session.pipeline.predict(X_test)
-                y_prob = self.session.pipeline.predict_proba(X_test)[:, 1]
+                fold_pipeline = clone(self.session.pipeline)
+                with self.session.timings.span("refit_fold_fit"):
+                    fold_pipeline.fit(X_train, y_train)
+                with self.session.timings.span("refit_fold_predict"):
+                    y_predict = fold_pipeline.predict(X_test)
+                    y_prob = fold_pipeline.predict_proba(X_test)[:, 1]
                 fpr, tpr, _ = roc_curve(y_test, y_prob)
                 roc_auc = auc(fpr, tpr)
 
@@ -298,7 +588,12 @@ class MainWindow(qtw.QMainWindow):
         except Exception as e:
             qtw.QMessageBox.warning(None, "Warning", repr(e))
         try:
-            self.session.pipeline.fit(X, y)
+            # The document processor keeps scoring documents with the current
+            # pipeline in its worker threads, so fit a copy and swap it in.
+            pipeline = clone(self.session.pipeline)
+            with self.session.timings.span("refit_fit"):
+                pipeline.fit(X, y)
+            self.session.pipeline = pipeline
         except Exception as e:
             qtw.QMessageBox.warning(None, "Warning", repr(e))
 
@@ -313,10 +608,11 @@ class NewSessionDialog(qtw.QDialog):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._plugin_loader = PluginLoader()
         self._init_ui()
         self._init_connections()
         self._load_settings()
-        self._plugin_loader = PluginLoader()
+        self._on_reader_changed(self.ui.reader_combo_box.currentText())
 
     def _init_ui(self):
         """Initialize the user interface."""
@@ -332,17 +628,22 @@ class NewSessionDialog(qtw.QDialog):
 
     @qtc.pyqtSlot(str)
     def _on_reader_changed(self, text: str):
-        """Handle a change in the PDF reader selection."""
-        # TODO: Decouple this method from knowledge about reader module internals.
-        # In particular, strings like "Tesseract" and "PyPDF" should be removed.
-        # Perhaps the reader module should provide a list of available readers,
-        # maybe as plugins, like the filters and pipelines. In any case, this
-        # method should not be aware of the internals of the reader module.
-        tesseract_settings_enabled = text == "Tesseract"
-        self.ui.poppler_dpi_spin_box.setEnabled(tesseract_settings_enabled)
-        self.ui.tesseract_language_line_edit.setEnabled(tesseract_settings_enabled)
-        self.ui.poppler_path_line_edit.setEnabled(tesseract_settings_enabled)
-        self.ui.tesseract_path_line_edit.setEnabled(tesseract_settings_enabled)
+        """Handle a change in the PDF reader selection by enabling only the settings
+        used by the selected reader."""
+        if not text:
+            return
+        used_settings = self._plugin_loader.get_reader_settings(text)
+        setting_widgets = {
+            "dpi": self.ui.poppler_dpi_spin_box,
+            "language": self.ui.tesseract_language_line_edit,
+            "poppler_path": self.ui.poppler_path_line_edit,
+            "tesseract_path": self.ui.tesseract_path_line_edit,
+            "workers": self.ui.ocr_workers_spin_box,
+            "rescan_dpi": self.ui.rescan_dpi_spin_box,
+            "min_confidence": self.ui.min_confidence_spin_box,
+        }
+        for setting, widget in setting_widgets.items():
+            widget.setEnabled(setting in used_settings)
 
     @qtc.pyqtSlot()
     def _on_accept_button_clicked(self):
@@ -361,12 +662,23 @@ class NewSessionDialog(qtw.QDialog):
                 .pipeline(self.ui.pipeline_combo_box.currentText())
                 .target(self.ui.target_button_group.checkedButton().text())
                 .sentencizer(self.ui.spacy_model_combo_box.currentText())
+                .page_cache()
+                .prefetch_depth(self.ui.prefetch_depth_spin_box.value())
+                .document_budget(
+                    self.ui.document_timeout_spin_box.value(),
+                    self.ui.max_pages_spin_box.value(),
+                )
+                .trace(self.ui.trace_check_box.isChecked())
+                .dataset(self.ui.dataset_path_line_edit.text())
                 .reader(
                     self.ui.reader_combo_box.currentText(),
                     self.ui.poppler_dpi_spin_box.value(),
                     self.ui.tesseract_language_line_edit.text(),
                     self.ui.poppler_path_line_edit.text(),
                     self.ui.tesseract_path_line_edit.text(),
+                    self.ui.ocr_workers_spin_box.value(),
+                    self.ui.rescan_dpi_spin_box.value(),
+                    self.ui.min_confidence_spin_box.value(),
                 )
             ).build()
             self.session_created.emit(session)
@@ -386,49 +698,124 @@ class NewSessionDialog(qtw.QDialog):
             if button.text() == settings.value("target"):
                 button.setChecked(True)
 
+    def _settings(self) -> list[tuple[str, Callable, Callable, Callable]]:
+        """Return the key of each of the dialog's settings but the target, with the
+        getter and setter of its widget and the cast of its stored value."""
+        ui = self.ui
+        return [
+            (
+                "sample_folder",
+                ui.sample_folder_path_line_edit.text,
+                ui.sample_folder_path_line_edit.setText,
+                str,
+            ),
+            (
+                "page_filter",
+                ui.page_filter_combo_box.currentText,
+                ui.page_filter_combo_box.setCurrentText,
+                str,
+            ),
+            (
+                "pipeline",
+                ui.pipeline_combo_box.currentText,
+                ui.pipeline_combo_box.setCurrentText,
+                str,
+            ),
+            (
+                "sentencizer",
+                ui.spacy_model_combo_box.currentText,
+                ui.spacy_model_combo_box.setCurrentText,
+                str,
+            ),
+            (
+                "prefetch_depth",
+                ui.prefetch_depth_spin_box.value,
+                ui.prefetch_depth_spin_box.setValue,
+                int,
+            ),
+            (
+                "document_timeout",
+                ui.document_timeout_spin_box.value,
+                ui.document_timeout_spin_box.setValue,
+                int,
+            ),
+            (
+                "max_pages",
+                ui.max_pages_spin_box.value,
+                ui.max_pages_spin_box.setValue,
+                int,
+            ),
+            (
+                "trace",
+                ui.trace_check_box.isChecked,
+                ui.trace_check_box.setChecked,
+                lambda value: value in (True, "true"),
+            ),
+            (
+                "reader",
+                ui.reader_combo_box.currentText,
+                ui.reader_combo_box.setCurrentText,
+                str,
+            ),
+            (
+                "poppler_dpi",
+                ui.poppler_dpi_spin_box.value,
+                ui.poppler_dpi_spin_box.setValue,
+                int,
+            ),
+            (
+                "tesseract_language",
+                ui.tesseract_language_line_edit.text,
+                ui.tesseract_language_line_edit.setText,
+                str,
+            ),
+            (
+                "poppler_path",
+                ui.poppler_path_line_edit.text,
+                ui.poppler_path_line_edit.setText,
+                str,
+            ),
+            (
+                "tesseract_path",
+                ui.tesseract_path_line_edit.text,
+                ui.tesseract_path_line_edit.setText,
+                str,
+            ),
+            (
+                "ocr_workers",
+                ui.ocr_workers_spin_box.value,
+                ui.ocr_workers_spin_box.setValue,
+                int,
+            ),
+            (
+                "rescan_dpi",
+                ui.rescan_dpi_spin_box.value,
+                ui.rescan_dpi_spin_box.setValue,
+                int,
+            ),
+            (
+                "min_confidence",
+                ui.min_confidence_spin_box.value,
+                ui.min_confidence_spin_box.setValue,
+                int,
+            ),
+        ]
+
     def _load_settings(self):
         """Load the dialog's settings."""
         settings = qtc.QSettings(self.ORGANIZATION, self.APPLICATION)
-        if settings.contains("sample_folder"):
-            self.ui.sample_folder_path_line_edit.setText(
-                settings.value("sample_folder")
-            )
-        if settings.contains("page_filter"):
-            self.ui.page_filter_combo_box.setCurrentText(settings.value("page_filter"))
-        if settings.contains("pipeline"):
-            self.ui.pipeline_combo_box.setCurrentText(settings.value("pipeline"))
+        for key, _, setter, cast in self._settings():
+            if settings.contains(key):
+                setter(cast(settings.value(key)))
         if settings.contains("target"):
             self._load_target_settings(settings)
-        if settings.contains("sentencizer"):
-            self.ui.spacy_model_combo_box.setCurrentText(settings.value("sentencizer"))
-        if settings.contains("reader"):
-            self.ui.reader_combo_box.setCurrentText(settings.value("reader"))
-        if settings.contains("poppler_dpi"):
-            self.ui.poppler_dpi_spin_box.setValue(settings.value("poppler_dpi"))
-        if settings.contains("tesseract_language"):
-            self.ui.tesseract_language_line_edit.setText(
-                settings.value("tesseract_language")
-            )
-        if settings.contains("poppler_path"):
-            self.ui.poppler_path_line_edit.setText(settings.value("poppler_path"))
-        if settings.contains("tesseract_path"):
-            self.ui.tesseract_path_line_edit.setText(settings.value("tesseract_path"))
 
     def _save_settings(self):
         """Save the dialog's settings."""
         settings = qtc.QSettings(self.ORGANIZATION, self.APPLICATION)
-        settings.setValue("sample_folder", self.ui.sample_folder_path_line_edit.text())
-        settings.setValue("page_filter", self.ui.page_filter_combo_box.currentText())
-        settings.setValue("pipeline", self.ui.pipeline_combo_box.currentText())
+        for key, getter, _, _ in self._settings():
+            settings.setValue(key, getter())
         settings.setValue("target", self.ui.target_button_group.checkedButton().text())
-        settings.setValue("sentencizer", self.ui.spacy_model_combo_box.currentText())
-        settings.setValue("reader", self.ui.reader_combo_box.currentText())
-        settings.setValue("poppler_dpi", self.ui.poppler_dpi_spin_box.value())
-        settings.setValue(
-            "tesseract_language", self.ui.tesseract_language_line_edit.text()
-        )
-        settings.setValue("poppler_path", self.ui.poppler_path_line_edit.text())
-        settings.setValue("tesseract_path", self.ui.tesseract_path_line_edit.text())
 
 
 class Application(qtw.QApplication):
@@ -441,8 +828,10 @@ class Application(qtw.QApplication):
 
     def __init__(self, argv: List[str]):
         super().__init__(argv)
+        self._journal = DatasetJournal()
         self._init_windows()
         self._init_connections()
+        self._offer_recovery()
 
     def _init_windows(self):
         """Initialize the application windows and dialogs."""
@@ -454,6 +843,7 @@ class Application(qtw.QApplication):
         """Initialize connections between signals and slots."""
         self.main_window.new_session_requested.connect(self.open_new_session_dialog)
         self.main_window.quit_requested.connect(self.request_quit)
+        self.new_session_dialog.session_created.connect(self.journal_session)
         self.new_session_dialog.session_created.connect(self.main_window.set_session)
         self.main_window.save_dataset_requested.connect(self.show_save_dataset_dialog)
 
@@ -483,20 +873,59 @@ class Application(qtw.QApplication):
     def request_quit(self):
         """Request the application to quit."""
         if self._user_wants_to_continue():
+            self._journal.discard()
             self.quit()
 
+    @qtc.pyqtSlot(Session)
+    def journal_session(self, session: Session):
+        """Record the changes to the dataset of a new session in the journal."""
+        session.dataset.set_journal(self._journal)
+
+    def _offer_recovery(self):
+        """Offer to recover the dataset of a previous session that ended without
+        its dataset being saved, e.g. by a crash."""
+        if not self._journal.has_changes():
+            return
+        answer = qtw.QMessageBox.question(
+            self.main_window,
+            "Recover dataset",
+            "The previous session ended before its dataset was saved. "
+            "Do you want to recover the dataset and save it?",
+            qtw.QMessageBox.StandardButton.Yes | qtw.QMessageBox.StandardButton.No,
+        )
+        if answer != qtw.QMessageBox.StandardButton.Yes:
+            self._journal.discard()
+            return
+        try:
+            dataset = DataframeTableModel.recover(self._journal)
+        except Exception as e:
+            logger.exception("Failed to recover dataset.")
+            qtw.QMessageBox.warning(None, "Warning", repr(e))
+            return
+        filename, _ = qtw.QFileDialog.getSaveFileName(
+            caption="Save recovered dataset",
+            filter=FILE_DIALOG_FILTER,
+            initialFilter="Comma separated values (*.csv)",
+        )
+        if filename:
+            dataset.save(filename)
+            self._journal.discard()
+
     @qtc.pyqtSlot(Session)
     def show_save_dataset_dialog(self, session: Session):
         # TODO: The name of this method is misleading.
         filename, _ = qtw.QFileDialog.getSaveFileName(
             caption="Save dataset",
-            filter="All files (*.*);;Comma separated values (*.csv)",
+            filter=FILE_DIALOG_FILTER,
             initialFilter="Comma separated values (*.csv)",
         )
         if filename:
-            session.dataset.save(filename)
+            with session.timings.span("save"):
+                session.dataset.save(filename)
             with open(f"{filename}_log.txt", "w") as f:
                 f.write(session.log_stream.getvalue())
+            if session.tracer is not None:
+                session.tracer.write(Path(f"{filename}_trace.json"))
 
 
 def main():
@@ -18,20 +18,39 @@ from __future__ import annotations
 
 import io
 import logging
+import os
 import random
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import asdict, dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Optional
 
+import numpy as np
 import pandas as pd
 from PyQt6 import QtCore as qtc
 from PyQt6 import QtGui as qtg
 from sklearn.pipeline import Pipeline
 
-from benkpress.api.reader import PyPDFReader, Reader, TesseractReader
+from benkpress.api.cache import PageTextCache
+from benkpress.api.cancellation import CancellationToken, Cancelled
+from benkpress.api.dataset import (
+    ARROW_BATCH_ROWS,
+    MemoryMappedColumns,
+    is_columnar,
+    is_lazy_loadable,
+    read_dataset,
+    write_dataset,
+)
+from benkpress.api.hash import filename_digest
+from benkpress.api.journal import DatasetJournal
+from benkpress.api.reader import Reader, ReaderSettings
+from benkpress.api.search import InvertedIndex, terms
+from benkpress.api.store import PageTextStore, StoreReader, StoreSentencizer
 from benkpress.api.tokenizer import Sentencizer
 from benkpress.plugin import PluginLoader
+from benkpress.timing import ChromeTracer, SpanRecorder
 
 logger = logging.getLogger(__name__)
 
@@ -48,11 +67,31 @@ class SampleStringStackModel(qtc.QStringListModel):
 
 
 class DataframeTableModel(qtc.QAbstractTableModel):
-    """A table model for displaying a pandas dataframe."""
+    """A table model for displaying a pandas dataframe.
+
+    The table is stored column by column in numpy arrays with spare capacity that
+    doubles whenever it runs out, so that appending rows takes amortized constant
+    time. A dataframe of the table is only materialized on demand, and is cached
+    until the table changes.
+
+    Cells are rendered straight from the column arrays. The positions of the columns
+    are cached, and so are the formatted strings of the most recently displayed
+    cells, since views ask for the same visible cells on every repaint.
+
+    With a journal set, every appended row and every edited value is recorded in
+    it, so that the dataset can be recovered after a crash. The journal is compacted
+    into a snapshot of the table written in a worker thread. Saving again to the
+    CSV file last saved to only appends the new rows, as long as no values have
+    been edited and no column types have changed since.
+
+    A dataset can be loaded lazily from an uncompressed Arrow IPC file, in which
+    case the texts are left in the memory-mapped file and read a record batch at a
+    time as views ask for them. All texts are read when a dataframe is needed, e.g.
+    when refitting or saving.
+    """
 
     # TODO: Naming is imprecise. This is not general dataframe table
     # model, but a specialized one.
-    # TODO: Consider deriving from QSortFilterProxyModel instead.
     # TODO: Establish consistent naming convention for table fields
     # across the application. For example, "page" vs "document".
     # TODO: Consider whether to use index column.
@@ -61,17 +100,43 @@ class DataframeTableModel(qtc.QAbstractTableModel):
         SAVED = 0
         UNSAVED = 1
 
+    MIN_CAPACITY: int = 1024
+    DISPLAY_CACHE_SIZE: int = 8192
+
+    # Emitted from the worker thread with the journal, the future of the snapshot
+    # written, its path, its number of rows and the position to carry over from.
+    _compaction_finished = qtc.pyqtSignal(object, object, object, int, int)
+
     def __init__(self):
         super().__init__()
         # Start on state "saved". It makes no sense to have an unsaved empty table
         # or an unsaved just loaded table. The table becomes unsaved only when
         # it is changed.
         self._save_status: DataframeTableModel.SaveStatus = self.SaveStatus.SAVED
-        self._df = pd.DataFrame()
+        self._columns: dict[str, np.ndarray] = {}
+        self._size = 0
+        self._capacity = 0
+        self._df: Optional[pd.DataFrame] = None
+        self._column_list: list[np.ndarray] = []
+        self._proba_column = -1
+        self._class_column = -1
+        self._display_cache: OrderedDict[tuple[int, int], str] = OrderedDict()
+        self._proba_brushes: dict[int, qtg.QBrush] = {}
+        self._journal: Optional[DatasetJournal] = None
+        self._compacting = False
+        self._compaction_executor = ThreadPoolExecutor(max_workers=1)
+        self._saved_path: Optional[Path] = None
+        self._saved_rows = 0
+        self._saved_dtypes: list[np.dtype] = []
+        self._edited_since_save = False
+        self._lazy_columns: Optional[MemoryMappedColumns] = None
+        self._lazy_names: tuple[str, ...] = ()
         # TODO: Consider whether these connections are enough to reflect all possible
         # changes of save state.
         self.layoutChanged.connect(self._set_unsaved)
         self.dataChanged.connect(self._set_unsaved)
+        self.rowsInserted.connect(self._set_unsaved)
+        self._compaction_finished.connect(self._on_compaction_finished)
 
     @qtc.pyqtSlot()
     def _set_unsaved(self):
@@ -83,18 +148,206 @@ class DataframeTableModel(qtc.QAbstractTableModel):
         self._save_status = self.SaveStatus.SAVED
 
     @classmethod
-    def load(cls, filepath_or_buffer: Any) -> DataframeTableModel:
+    def recover(cls, journal: DatasetJournal) -> DataframeTableModel:
+        """Recover a dataset by replaying the records of a journal."""
         model = cls()
-        model._df = pd.read_csv(filepath_or_buffer, index_col=False)
+        for record in journal.records():
+            if record["op"] == "base":
+                if record["path"] is not None:
+                    df = read_dataset(record["path"], index_col=0)
+                    model._set_dataframe(df.head(record["rows"]).reset_index(drop=True))
+            elif record["op"] == "append":
+                model._append_records(record["rows"])
+            elif record["op"] == "set":
+                column = list(model._columns).index(record["column"])
+                model.setData(model.index(record["row"], column), record["value"])
+        logger.info(f"Recovered {model.rowCount()} rows from {journal}")
         return model
 
+    def set_journal(self, journal: DatasetJournal) -> None:
+        """Record all further changes to the dataset in the given journal."""
+        self._journal = journal
+        if not self._size:
+            journal.start()
+        elif self.is_saved() and self._saved_path is not None:
+            journal.start(self._saved_path, self._saved_rows)
+        else:
+            journal.compact(self.dataframe())
+
+    def _compact_journal_if_needed(self) -> None:
+        """Start writing a snapshot of the table in the worker thread, if the journal
+        needs compaction and no snapshot is being written."""
+        if self._compacting or not self._journal.needs_compaction():
+            return
+        journal = self._journal
+        snapshot_path, position = journal.start_compaction()
+        rows = self._size
+        future = self._compaction_executor.submit(
+            journal.write_snapshot, snapshot_path, self.iter_dataframe_batches()
+        )
+        self._compacting = True
+        future.add_done_callback(
+            lambda future: self._compaction_finished.emit(
+                journal, future, snapshot_path, rows, position
+            )
+        )
+
+    @qtc.pyqtSlot(object, object, object, int, int)
+    def _on_compaction_finished(
+        self,
+        journal: DatasetJournal,
+        future: Future,
+        snapshot_path: Path,
+        rows: int,
+        position: int,
+    ):
+        self._compacting = False
+        if future.exception() is not None:
+            # Keep the journal as it is. The next record tries again.
+            logger.error(
+                "Failed to write a snapshot of the dataset",
+                exc_info=future.exception(),
+            )
+            snapshot_path.with_suffix(".tmp").unlink(missing_ok=True)
+            return
+        journal.finish_compaction(snapshot_path, rows, position)
+
+    @classmethod
+    def load(cls, filepath_or_buffer: Any, lazy: bool = False) -> DataframeTableModel:
+        """Load a dataset. If lazy, and the dataset is an Arrow IPC file, the texts
+        are read only when needed."""
+        model = cls()
+        if lazy and is_lazy_loadable(filepath_or_buffer):
+            lazy_columns = MemoryMappedColumns(Path(filepath_or_buffer))
+            lazy_names = tuple(name for name in lazy_columns.names if name == "text")
+            eager_names = [n for n in lazy_columns.names if n not in lazy_names]
+            model._set_dataframe(
+                lazy_columns.read(eager_names), lazy_columns, lazy_names
+            )
+            logger.info(f"Loaded {model.rowCount()} rows lazily from {lazy_columns}")
+        else:
+            df = read_dataset(filepath_or_buffer, index_col=0)
+            model._set_dataframe(df.reset_index(drop=True))
+        if isinstance(filepath_or_buffer, (str, os.PathLike)):
+            model._saved_path = Path(filepath_or_buffer)
+            model._saved_rows = model._size
+            model._saved_dtypes = [column.dtype for column in model._column_list]
+        return model
+
+    def _set_dataframe(
+        self,
+        df: pd.DataFrame,
+        lazy_columns: Optional[MemoryMappedColumns] = None,
+        lazy_names: tuple[str, ...] = (),
+    ) -> None:
+        """Set the contents of the table. Columns named in `lazy_names` are read from
+        `lazy_columns` on demand, in the order of the columns of that file."""
+        self._size = len(df)
+        self._capacity = max(self.MIN_CAPACITY, self._size)
+        self._columns = {}
+        names = lazy_columns.names if lazy_columns is not None else df.columns
+        for name in names:
+            if name in lazy_names:
+                column = np.empty(self._capacity, dtype=object)
+                column[: self._size] = _UNLOADED
+            else:
+                values = _as_column_values(df[name].to_numpy())
+                column = np.empty(self._capacity, dtype=values.dtype)
+                column[: self._size] = values
+            self._columns[name] = column
+        self._lazy_columns = lazy_columns if lazy_names else None
+        self._lazy_names = lazy_names
+        self._df = None
+        self._update_column_cache()
+
+    def _load_lazy_batch(self, row: int, column: int) -> Any:
+        """Read the record batch holding a lazily loaded value, and return it."""
+        name = list(self._columns)[column]
+        first, values = self._lazy_columns.read_batch(name, row)
+        self._column_list[column][first : first + len(values)] = values
+        return self._column_list[column][row]
+
+    def _load_lazy_columns(self) -> None:
+        """Read all values of the lazily loaded columns."""
+        if self._lazy_columns is None:
+            return
+        for name in self._lazy_names:
+            values = self._lazy_columns.read_column(name)
+            self._columns[name][: len(values)] = values
+        logger.info(f"Read all lazily loaded values from {self._lazy_columns}")
+        self._lazy_columns = None
+
+    def _update_column_cache(self) -> None:
+        """Cache the column arrays by position, and the positions of the columns
+        that are rendered specially. Call whenever a column array is replaced."""
+        self._column_list = list(self._columns.values())
+        names = list(self._columns)
+        self._proba_column = names.index("proba") if "proba" in names else -1
+        self._class_column = names.index("class") if "class" in names else -1
+
+    def file_ids(self) -> np.ndarray:
+        """Return the file ids of all rows, without reading lazily loaded texts."""
+        if "file" not in self._columns:
+            return np.empty(0, dtype=object)
+        return self._columns["file"][: self._size]
+
+    def has_column(self, name: str) -> bool:
+        return name in self._columns
+
+    def column_values(self, name: str) -> np.ndarray:
+        """Return the values of a column as an array, reading them first if they
+        are loaded lazily. Do not modify it."""
+        if name in self._lazy_names:
+            self._load_lazy_columns()
+        return self._columns[name][: self._size]
+
+    def iter_column_batches(
+        self, name: str, first: int = 0, batch_rows: int = ARROW_BATCH_ROWS
+    ) -> Iterator[np.ndarray]:
+        """Iterate over the values of a column from the given row on, in batches,
+        as they are when called, without reading lazily loaded values up front.
+
+        The iteration may be done in another thread, since rows are only ever
+        appended past the end of the values, and lazily loaded values are read
+        from a memory map of their own."""
+        column = self._columns[name][: self._size]
+        lazy_filepath = None
+        lazy_rows = 0
+        if name in self._lazy_names and self._lazy_columns is not None:
+            lazy_filepath = self._lazy_columns.filepath
+            lazy_rows = len(self._lazy_columns)
+        return _iter_column_batches(
+            column, name, first, batch_rows, lazy_filepath, lazy_rows
+        )
+
+    def iter_dataframe_batches(
+        self, batch_rows: int = ARROW_BATCH_ROWS
+    ) -> Iterator[pd.DataFrame]:
+        """Iterate over the table in dataframes of consecutive rows, indexed by row,
+        like `iter_column_batches`. The iteration may be done in another thread."""
+        columns = {name: column[: self._size] for name, column in self._columns.items()}
+        lazy_batches = {}
+        if self._lazy_columns is not None:
+            lazy_batches = {
+                name: self.iter_column_batches(name, batch_rows=batch_rows)
+                for name in self._lazy_names
+            }
+        return _iter_dataframe_batches(columns, lazy_batches, self._size, batch_rows)
+
     def texts(self) -> pd.Series:
-        return self._df["text"]
+        return self.dataframe()["text"]
 
     def classes(self) -> pd.Series:
-        return self._df["class"]
+        return self.dataframe()["class"]
 
     def dataframe(self) -> pd.DataFrame:
+        """Return the table as a dataframe. Do not modify it; it is cached until the
+        table changes."""
+        if self._df is None:
+            self._load_lazy_columns()
+            self._df = pd.DataFrame(
+                {name: column[: self._size] for name, column in self._columns.items()}
+            )
         return self._df
 
     def is_saved(self) -> bool:
@@ -102,59 +355,163 @@ class DataframeTableModel(qtc.QAbstractTableModel):
 
     def save(self, filepath_or_buffer: Any) -> None:
         # TODO: Consider whether to save the page and proba columns.
-        self._df["class"] = pd.to_numeric(self._df["class"])
-        self._df.to_csv(filepath_or_buffer)
+        if "class" in self._columns:
+            self._set_column(
+                "class",
+                _as_column_values(pd.to_numeric(self._columns["class"][: self._size])),
+            )
+        if not isinstance(filepath_or_buffer, (str, os.PathLike)):
+            write_dataset(self.dataframe(), filepath_or_buffer)
+            self._set_saved()
+            return
+        path = Path(filepath_or_buffer)
+        dtypes = [column.dtype for column in self._column_list]
+        if (
+            path == self._saved_path
+            and not is_columnar(path)
+            and path.exists()
+            and not self._edited_since_save
+            and dtypes == self._saved_dtypes
+        ):
+            self.dataframe().iloc[self._saved_rows :].to_csv(
+                path, mode="a", header=False
+            )
+        else:
+            write_dataset(self.dataframe(), path)
+        self._saved_path = path
+        self._saved_rows = self._size
+        self._saved_dtypes = dtypes
+        self._edited_since_save = False
+        if self._journal is not None:
+            self._journal.start(path, self._size)
         self._set_saved()
 
     def appendRow(self, row: DataframeTableModel.RowConfig):
-        self.beginInsertRows(qtc.QModelIndex(), self.rowCount(), self.rowCount())
-        new_row = pd.DataFrame(
-            row.dict(),
-            index=[0],
-        )
-        self._df = pd.concat([self._df.loc[:], new_row]).reset_index(drop=True)
+        self.appendRows([row])
+
+    def appendRows(self, rows: list[DataframeTableModel.RowConfig]):
+        """Append rows to the table, notifying views with a single insertion."""
+        if not rows:
+            return
+        records = [row.dict() for row in rows]
+        self._append_records(records)
+        if self._journal is not None:
+            self._journal.append_rows(records)
+            self._compact_journal_if_needed()
+
+    def _append_records(self, records: list[dict]):
+        first = self._size
+        last = first + len(records) - 1
+        self.beginInsertRows(qtc.QModelIndex(), first, last)
+        self._reserve(last + 1)
+        new_values = {
+            name: _as_column_values([record[name] for record in records])
+            for name in records[0]
+        }
+        for name, values in new_values.items():
+            if name not in self._columns:
+                self._add_column(name, values.dtype)
+        for name, column in list(self._columns.items()):
+            values = new_values.get(name)
+            if values is None:
+                values = _missing_values(column.dtype, len(records))
+            dtype = np.promote_types(column.dtype, values.dtype)
+            if dtype != column.dtype:
+                column = column.astype(dtype)
+                self._columns[name] = column
+                # Promoted values are formatted differently, e.g. 1 as 1.0.
+                self._display_cache.clear()
+            column[first : last + 1] = values
+        self._size = last + 1
+        self._df = None
+        self._update_column_cache()
         self.endInsertRows()
-        self.layoutChanged.emit()
+
+    def _reserve(self, size: int) -> None:
+        """Grow the capacity of all columns to fit at least the given size."""
+        if size <= self._capacity:
+            return
+        self._capacity = max(size, 2 * self._capacity, self.MIN_CAPACITY)
+        for name, column in self._columns.items():
+            grown = np.empty(self._capacity, dtype=column.dtype)
+            grown[: self._size] = column[: self._size]
+            self._columns[name] = grown
+        self._update_column_cache()
+
+    def _add_column(self, name: str, dtype: np.dtype) -> None:
+        """Add a column for values of the given dtype, that is missing a value in all
+        present rows."""
+        missing = _missing_values(dtype, self._size)
+        if self._size:
+            dtype = np.promote_types(dtype, missing.dtype)
+        column = np.empty(self._capacity, dtype=dtype)
+        column[: self._size] = missing
+        self._columns[name] = column
+
+    def _set_column(self, name: str, values: np.ndarray) -> None:
+        column = np.empty(self._capacity, dtype=values.dtype)
+        column[: self._size] = values
+        self._columns[name] = column
+        self._df = None
+        self._display_cache.clear()
+        self._update_column_cache()
 
     def rowCount(self, parent=None):
-        return self._df.shape[0]
+        return self._size
 
     def columnCount(self, parent=None):
-        return self._df.shape[1]
+        return len(self._columns)
 
     def data(self, index, role=qtc.Qt.ItemDataRole.DisplayRole):
         if index.isValid():
             if role == qtc.Qt.ItemDataRole.DisplayRole:
-                return str(self._df.iloc[index.row(), index.column()])
+                return self._display_text(index.row(), index.column())
             elif role == qtc.Qt.ItemDataRole.ForegroundRole:
-                if index.column() == self._df.columns.get_loc("proba"):
-                    brush = qtg.QBrush()
-                    brush.setColor(
-                        qtg.QColor.fromRgb(
-                            0,
-                            int(
-                                255.0
-                                * float(self._df.iloc[index.row(), index.column()])
-                            ),
-                            0,
-                        )
-                    )
-                    return brush
+                if index.column() == self._proba_column:
+                    proba = self._column_list[self._proba_column][index.row()]
+                    if pd.isna(proba):
+                        return None
+                    return self._proba_brush(int(255.0 * float(proba)))
         return None
 
+    def _display_text(self, row: int, column: int) -> str:
+        key = (row, column)
+        cache = self._display_cache
+        text = cache.get(key)
+        if text is None:
+            value = self._column_list[column][row]
+            if value is _UNLOADED:
+                value = self._load_lazy_batch(row, column)
+            text = str(value)
+            cache[key] = text
+            if len(cache) > self.DISPLAY_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return text
+
+    def _proba_brush(self, green: int) -> qtg.QBrush:
+        brush = self._proba_brushes.get(green)
+        if brush is None:
+            brush = qtg.QBrush()
+            brush.setColor(qtg.QColor.fromRgb(0, green, 0))
+            self._proba_brushes[green] = brush
+        return brush
+
     def headerData(self, col, orientation, role):
         if (
             orientation == qtc.Qt.Orientation.Horizontal
             and role == qtc.Qt.ItemDataRole.DisplayRole
         ):
-            if len(self._df.columns) > col:
-                return self._df.columns[col]
+            if len(self._columns) > col:
+                return list(self._columns)[col]
         return None
 
-    def _dtype_to_cast(self, column: int, column_dtypes: pd.Series) -> Any:
-        if column_dtypes[column] == "int64":
+    def _dtype_to_cast(self, column: int) -> Any:
+        dtype = self._column_list[column].dtype
+        if dtype.kind in "iu":
             return int
-        elif column_dtypes[column] == "float64":
+        elif dtype.kind == "f":
             return float
         else:
             return str
@@ -163,9 +520,17 @@ class DataframeTableModel(qtc.QAbstractTableModel):
         if role == qtc.Qt.ItemDataRole.EditRole:
             if not index.isValid():
                 return False
-            cast_function = self._dtype_to_cast(index.column(), self._df.dtypes)
+            cast_function = self._dtype_to_cast(index.column())
             try:
-                self._df.iloc[index.row(), index.column()] = cast_function(value)
+                value = cast_function(value)
+                self._column_list[index.column()][index.row()] = value
+                self._df = None
+                self._display_cache.pop((index.row(), index.column()), None)
+                self._edited_since_save = True
+                if self._journal is not None:
+                    name = list(self._columns)[index.column()]
+                    self._journal.set_value(index.row(), name, value)
+                    self._compact_journal_if_needed()
                 self.dataChanged.emit(index, index, [role])
                 return True
             except ValueError:
@@ -173,7 +538,7 @@ class DataframeTableModel(qtc.QAbstractTableModel):
         return False
 
     def flags(self, index):
-        if index.column() == self._df.columns.get_loc("class"):
+        if index.column() == self._class_column:
             return qtc.Qt.ItemFlag.ItemIsEditable | super().flags(index)
         else:
             return super().flags(index)
@@ -192,6 +557,313 @@ class DataframeTableModel(qtc.QAbstractTableModel):
             return {k.strip("_"): v for k, v in asdict(self).items()}
 
 
+class DatasetFilterProxyModel(qtc.QAbstractProxyModel):
+    """A proxy model that shows the rows of a dataset table model whose texts
+    contain all terms of a search query, and whose class and proba pass filters.
+
+    The shown rows are kept as an ascending array of source rows. Queries are
+    answered from an inverted index over the texts, which is built in a worker
+    thread on the first query, and then kept up to date as rows are appended to
+    the dataset. Until the index is built, the rows shown before the query are
+    kept, and the filter is applied once it is done. Appended rows are filtered as
+    they arrive; edited rows are filtered again only when the filter changes.
+    """
+
+    # The number of rows indexed between checks for cancellation and reports of
+    # progress.
+    INDEXING_CHUNK_ROWS: int = 65536
+
+    # Emitted with the number of rows indexed so far and the number of rows to
+    # index, while the index is built and once it is done.
+    indexing_progressed = qtc.pyqtSignal(int, int)
+    # Emitted from the worker thread with the token and the built index.
+    _indexing_finished = qtc.pyqtSignal(object, object)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._rows = np.empty(0, dtype=np.int64)
+        self._search_index: Optional[InvertedIndex] = None
+        self._indexing_token: Optional[CancellationToken] = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._query = ""
+        self._class: Optional[int] = None
+        self._min_proba = 0.0
+        self._max_proba = 1.0
+        self._indexing_finished.connect(self._on_indexing_finished)
+
+    def setSourceModel(self, source: DataframeTableModel):
+        previous_source = self.sourceModel()
+        if previous_source is not None:
+            previous_source.rowsInserted.disconnect(self._on_source_rows_inserted)
+            previous_source.dataChanged.disconnect(self._on_source_data_changed)
+        if self._indexing_token is not None:
+            self._indexing_token.cancel()
+            self._indexing_token = None
+        self._search_index = None
+        super().setSourceModel(source)
+        source.rowsInserted.connect(self._on_source_rows_inserted)
+        source.dataChanged.connect(self._on_source_data_changed)
+        self._refilter()
+
+    def is_filtered(self) -> bool:
+        return (
+            bool(terms(self._query))
+            or self._class is not None
+            or self._min_proba > 0.0
+            or self._max_proba < 1.0
+        )
+
+    def is_indexing(self) -> bool:
+        """Whether the search index is being built."""
+        return self._indexing_token is not None
+
+    def set_filter(
+        self,
+        query: str = "",
+        class_: Optional[int] = None,
+        min_proba: float = 0.0,
+        max_proba: float = 1.0,
+    ) -> None:
+        """Show only the rows whose texts contain all terms of the query, of the
+        given class unless None, and with a proba in the given range."""
+        self._query = query
+        self._class = class_
+        self._min_proba = min_proba
+        self._max_proba = max_proba
+        self._refilter()
+
+    def _refilter(self) -> None:
+        source = self.sourceModel()
+        if source is None:
+            return
+        if self._waiting_for_index():
+            self._start_indexing()
+            return
+        self.beginResetModel()
+        self._rows = self._matching_rows(0, source.rowCount())
+        self.endResetModel()
+
+    def _needs_index(self) -> bool:
+        return bool(terms(self._query)) and self.sourceModel().has_column("text")
+
+    def _waiting_for_index(self) -> bool:
+        return self.is_indexing() or (
+            self._needs_index() and self._search_index is None
+        )
+
+    def _start_indexing(self) -> None:
+        """Start building the search index in the worker thread, unless started."""
+        if self._indexing_token is not None:
+            return
+        source = self.sourceModel()
+        batches = source.iter_column_batches(
+            "text", batch_rows=self.INDEXING_CHUNK_ROWS
+        )
+        self._indexing_token = CancellationToken()
+        self.indexing_progressed.emit(0, source.rowCount())
+        self._executor.submit(
+            self._build_index, batches, source.rowCount(), self._indexing_token
+        )
+
+    def _build_index(
+        self, batches: Iterator[np.ndarray], row_count: int, token: CancellationToken
+    ) -> None:
+        """Build a search index over the given batches of texts, reading them if
+        they are loaded lazily. Runs in the worker thread."""
+        index = InvertedIndex()
+        try:
+            for texts in batches:
+                token.raise_if_cancelled()
+                index.add(texts)
+                self.indexing_progressed.emit(index.row_count, row_count)
+        except Cancelled:
+            return
+        except Exception:
+            logger.exception("Failed to build the search index")
+            index = None
+        self._indexing_finished.emit(token, index)
+
+    @qtc.pyqtSlot(object, object)
+    def _on_indexing_finished(
+        self, token: CancellationToken, index: Optional[InvertedIndex]
+    ):
+        if token is not self._indexing_token:
+            return
+        self._indexing_token = None
+        if index is None:
+            # Leave the rows as they are. The next change of filter tries again.
+            self.indexing_progressed.emit(0, 0)
+            return
+        self._search_index = index
+        self._refilter()
+        self.indexing_progressed.emit(index.row_count, index.row_count)
+
+    def _index_texts(self) -> InvertedIndex:
+        """Return the search index, after adding the rows it is missing."""
+        source = self.sourceModel()
+        if self._search_index.row_count < source.rowCount():
+            for texts in source.iter_column_batches(
+                "text", self._search_index.row_count
+            ):
+                self._search_index.add(texts)
+        return self._search_index
+
+    def _matching_rows(self, first: int, end: int) -> np.ndarray:
+        """Return the source rows from first up to end that pass the filter."""
+        source = self.sourceModel()
+        if self._needs_index():
+            rows = self._index_texts().query(self._query)
+            rows = rows[np.searchsorted(rows, first) : np.searchsorted(rows, end)]
+        else:
+            rows = np.arange(first, end)
+        if self._class is not None and source.has_column("class"):
+            rows = rows[source.column_values("class")[rows] == self._class]
+        if (self._min_proba > 0.0 or self._max_proba < 1.0) and source.has_column(
+            "proba"
+        ):
+            probas = source.column_values("proba")[rows].astype(float)
+            rows = rows[(probas >= self._min_proba) & (probas <= self._max_proba)]
+        return rows
+
+    @qtc.pyqtSlot(qtc.QModelIndex, int, int)
+    def _on_source_rows_inserted(self, parent: qtc.QModelIndex, first: int, last: int):
+        if self._waiting_for_index():
+            # All rows are filtered once the index is built.
+            return
+        if self._search_index is not None:
+            self._index_texts()
+        new_rows = self._matching_rows(first, last + 1)
+        if not len(new_rows):
+            return
+        count = len(self._rows)
+        self.beginInsertRows(qtc.QModelIndex(), count, count + len(new_rows) - 1)
+        self._rows = np.concatenate([self._rows, new_rows])
+        self.endInsertRows()
+
+    @qtc.pyqtSlot("QModelIndex", "QModelIndex", "QList<int>")
+    def _on_source_data_changed(
+        self, top_left: qtc.QModelIndex, bottom_right: qtc.QModelIndex, roles: list
+    ):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            first = self.mapFromSource(self.sourceModel().index(row, top_left.column()))
+            if first.isValid():
+                last = self.index(first.row(), bottom_right.column())
+                self.dataChanged.emit(first, last, roles)
+
+    def mapToSource(self, proxy_index: qtc.QModelIndex) -> qtc.QModelIndex:
+        if not proxy_index.isValid():
+            return qtc.QModelIndex()
+        return self.sourceModel().index(
+            int(self._rows[proxy_index.row()]), proxy_index.column()
+        )
+
+    def mapFromSource(self, source_index: qtc.QModelIndex) -> qtc.QModelIndex:
+        if not source_index.isValid():
+            return qtc.QModelIndex()
+        row = int(np.searchsorted(self._rows, source_index.row()))
+        if row < len(self._rows) and self._rows[row] == source_index.row():
+            return self.index(row, source_index.column())
+        return qtc.QModelIndex()
+
+    def index(self, row, column, parent=qtc.QModelIndex()):
+        if parent.isValid() or not 0 <= row < len(self._rows):
+            return qtc.QModelIndex()
+        if not 0 <= column < self.columnCount():
+            return qtc.QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        return qtc.QModelIndex()
+
+    def rowCount(self, parent=qtc.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=qtc.QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+
+    def headerData(self, section, orientation, role):
+        if orientation == qtc.Qt.Orientation.Vertical:
+            # Number the rows as in the dataset rather than as shown.
+            if role == qtc.Qt.ItemDataRole.DisplayRole and section < len(self._rows):
+                return int(self._rows[section]) + 1
+            return None
+        return self.sourceModel().headerData(section, orientation, role)
+
+
+def _iter_column_batches(
+    column: np.ndarray,
+    name: str,
+    first: int,
+    batch_rows: int,
+    lazy_filepath: Optional[Path],
+    lazy_rows: int,
+) -> Iterator[np.ndarray]:
+    if lazy_filepath is not None and first < lazy_rows:
+        for batch_first, values in MemoryMappedColumns(lazy_filepath).iter_batches(
+            name
+        ):
+            if batch_first + len(values) > first:
+                yield values[max(first - batch_first, 0) :]
+        first = lazy_rows
+    for start in range(first, len(column), batch_rows):
+        yield column[start : start + batch_rows]
+
+
+def _iter_dataframe_batches(
+    columns: dict[str, np.ndarray],
+    lazy_batches: dict[str, Iterator[np.ndarray]],
+    size: int,
+    batch_rows: int,
+) -> Iterator[pd.DataFrame]:
+    """Iterate over dataframes of the columns, batch by batch. The values of lazily
+    loaded columns are taken from their batches, which set the batch sizes."""
+    if not size:
+        yield pd.DataFrame(columns)
+        return
+    first = 0
+    while first < size:
+        lazy_values = {name: next(batches) for name, batches in lazy_batches.items()}
+        if lazy_values:
+            end = first + len(next(iter(lazy_values.values())))
+        else:
+            end = min(first + batch_rows, size)
+        yield pd.DataFrame(
+            {
+                name: lazy_values[name] if name in lazy_values else column[first:end]
+                for name, column in columns.items()
+            },
+            index=pd.RangeIndex(first, end),
+        )
+        first = end
+
+
+# Stands in for the values of lazily loaded columns that have not been read yet.
+_UNLOADED = object()
+
+
+def _as_column_values(values: Any) -> np.ndarray:
+    """Convert values to a column array. Strings are stored as objects rather than
+    as fixed width strings."""
+    values = np.asarray(values)
+    if values.dtype.kind in "USO":
+        return values.astype(object)
+    return values
+
+
+def _missing_values(dtype: np.dtype, count: int) -> np.ndarray:
+    """Return an array of missing values that can be stored in a column of the given
+    dtype once promoted, the way pandas fills in missing values when concatenating."""
+    if dtype.kind == "O":
+        return np.full(count, None, dtype=object)
+    return np.full(count, np.nan)
+
+
 @dataclass
 class Session:
     """Describes a tagging session of the application."""
@@ -213,6 +885,12 @@ class Session:
     sample: SampleStringStackModel = field(
         default_factory=lambda: SampleStringStackModel()
     )
+    page_cache: Optional[PageTextCache] = None
+    prefetch_depth: int = 1
+    timings: SpanRecorder = field(default_factory=lambda: SpanRecorder())
+    tracer: Optional[ChromeTracer] = None
+    document_timeout: float = 0.0
+    max_pages: int = 0
 
     class Builder:
         """Builds a session object from raw input."""
@@ -230,6 +908,13 @@ class Session:
             self._page_filter = None
             self._reader = None
             self._sentencizer = None
+            self._page_cache = None
+            self._prefetch_depth = 1
+            self._store = None
+            self._tracer = None
+            self._document_timeout = 0.0
+            self._max_pages = 0
+            self._dataset = None
 
         def log_stream(self, format: str = logging.BASIC_FORMAT) -> Session.Builder:
             # TODO: Consider whether to activate the log stream here or in the Session.
@@ -241,11 +926,18 @@ class Session:
             return self
 
         def sample(self, sample_folder_name: str) -> Session.Builder:
-            """Create a sample instance based on the given sample folder."""
+            """Create a sample instance based on the given sample folder, or on the
+            files of a store made by benkpress-preprocess."""
             sample_folder = Path(sample_folder_name)
-            self._sample_file_paths = [
-                str(f) for f in sample_folder.iterdir() if f.is_file()
-            ]
+            if PageTextStore.is_store(sample_folder):
+                self._store = PageTextStore(sample_folder)
+                self._sample_file_paths = self._store.file_paths()
+                logger.info(self._store)
+                logger.info(self._store.meta())
+            else:
+                self._sample_file_paths = [
+                    str(f) for f in sample_folder.iterdir() if f.is_file()
+                ]
             random.shuffle(self._sample_file_paths)
             logger.info(sample_folder)
             return self
@@ -275,24 +967,23 @@ class Session:
             language: str,
             poppler_path: str,
             tesseract_path: str,
+            workers: int = 1,
+            rescan_dpi: int = 0,
+            min_confidence: float = 60.0,
         ) -> Session.Builder:
             """Create a reader instance based on the given reader name and raw parameters."""
-            # TODO: Decouple this method from knowledge about reader module internals.
-            # In particular, strings like "Tesseract" and "PyPDF" should be removed.
-            # Perhaps the reader module should provide a list of available readers,
-            # maybe as plugins, like the filters and pipelines. In any case, this
-            # method should not be aware of the internals of the reader module.
-            if reader_name == "Tesseract":
-                self._reader = TesseractReader(
-                    tesseract_path=tesseract_path,
-                    tesseract_language=language,
-                    poppler_path=poppler_path,
-                    dpi=dpi,
-                )
-            elif reader_name == "PyPDF":
-                self._reader = PyPDFReader()
-            else:
+            if reader_name not in self._plugin_loader.get_available_readers():
                 raise ValueError(f"Unknown reader name: {reader_name}")
+            settings = ReaderSettings(
+                dpi=dpi,
+                language=language,
+                poppler_path=poppler_path,
+                tesseract_path=tesseract_path,
+                workers=workers,
+                rescan_dpi=rescan_dpi,
+                min_confidence=min_confidence,
+            )
+            self._reader = self._plugin_loader.load_reader(reader_name, settings)
             logger.info(self._reader)
             return self
 
@@ -302,7 +993,60 @@ class Session:
             logger.info(self._sentencizer)
             return self
 
+        def page_cache(self, enabled: bool = True) -> Session.Builder:
+            """Create a persistent page text cache, unless disabled."""
+            self._page_cache = PageTextCache() if enabled else None
+            logger.info(self._page_cache)
+            return self
+
+        def prefetch_depth(self, depth: int) -> Session.Builder:
+            """Set the number of documents to process ahead of time."""
+            self._prefetch_depth = max(1, depth)
+            logger.info(f"Prefetch depth: {self._prefetch_depth}")
+            return self
+
+        def document_budget(
+            self, timeout: float = 0.0, max_pages: int = 0
+        ) -> Session.Builder:
+            """Set the time in seconds and the number of pages that reading a single
+            document may take before it is quarantined. Zero is unlimited."""
+            self._document_timeout = max(0.0, timeout)
+            self._max_pages = max(0, max_pages)
+            logger.info(
+                f"Document budget: {self._document_timeout:g} s, "
+                f"{self._max_pages} pages"
+            )
+            return self
+
+        def dataset(self, dataset_path: str) -> Session.Builder:
+            """Continue tagging into an existing dataset, unless no path is given.
+            Arrow IPC datasets are loaded lazily."""
+            if dataset_path:
+                self._dataset = DataframeTableModel.load(dataset_path, lazy=True)
+                logger.info(
+                    f"Dataset: {dataset_path} ({self._dataset.rowCount()} rows)"
+                )
+            else:
+                self._dataset = None
+            return self
+
+        def trace(self, enabled: bool = True) -> Session.Builder:
+            """Record a Chrome trace of the session, unless disabled."""
+            self._tracer = ChromeTracer() if enabled else None
+            logger.info(f"Tracing: {enabled}")
+            return self
+
         def build(self) -> Session:
+            if self._store is not None:
+                # Pages and sentences are read from the store rather than the files,
+                # so neither the chosen reader, the page cache nor the document
+                # budget is used.
+                self._reader = StoreReader(self._store)
+                self._sentencizer = StoreSentencizer(self._store, self._sentencizer)
+                self._page_cache = None
+                self._document_timeout = 0.0
+                self._max_pages = 0
+                logger.info(self._reader)
             session = Session(
                 log_stream=self._log_stream,
                 target=self._target,
@@ -310,7 +1054,23 @@ class Session:
                 page_filter=self._page_filter,
                 reader=self._reader,
                 sentencizer=self._sentencizer,
+                page_cache=self._page_cache,
+                prefetch_depth=self._prefetch_depth,
+                tracer=self._tracer,
+                document_timeout=self._document_timeout,
+                max_pages=self._max_pages,
             )
+            if self._dataset is not None:
+                session.dataset = self._dataset
+                # Skip the files that are already part of the dataset.
+                tagged_file_ids = set(self._dataset.file_ids())
+                self._sample_file_paths = [
+                    path
+                    for path in self._sample_file_paths
+                    if filename_digest(Path(path)) not in tagged_file_ids
+                ]
+            if self._tracer is not None:
+                session.timings.add_listener(self._tracer)
             session.sample.setStringList(self._sample_file_paths)
             return session
 
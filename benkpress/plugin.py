@@ -14,8 +14,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
+import sys
+import threading
+from dataclasses import fields
 from importlib.metadata import EntryPoint, entry_points
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 from imblearn.over_sampling import SMOTE
 from imblearn.pipeline import Pipeline as ImbalancedPipeline
@@ -25,7 +29,8 @@ from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.pipeline import Pipeline
 from xgboost import XGBClassifier
 
-from benkpress.api.tokenizer import Lemmatizer
+from benkpress.api.reader import Reader, ReaderSettings
+from benkpress.api.tokenizer import LemmatizingTransformer
 
 
 class PassthroughPageClassifier(BaseEstimator, ClassifierMixin):
@@ -61,21 +66,24 @@ def tfidf_transformer():
     ]
 
 
-# _tokenizer_en = Lemmatizer("en_core_web_lg")
-_tokenizer_sv = Lemmatizer("sv_core_news_lg")
+def _passthrough_analyzer(lemmas):
+    """Analyzer for vectorizers whose input is already tokenized."""
+    return lemmas
+
 
 # TODO: Should supply tokenizer as parameter and it should work through load_entry_point
 
 
 def tfidf_sv_smote_transformers():
     return [
+        ("Lemmatizer", LemmatizingTransformer("sv_core_news_lg")),
         (
             "Vectorizer",
             TfidfVectorizer(
                 use_idf=True,
                 max_features=None,
                 stop_words=None,
-                tokenizer=_tokenizer_sv.lemmatize,
+                analyzer=_passthrough_analyzer,
             ),
         ),
         ("Oversampler", SMOTE(sampling_strategy=0.5)),
@@ -100,24 +108,82 @@ def tfidf_sv_smote_xgb_pipeline():
     )
 
 
+_entry_point_index: Dict[str, Dict[str, EntryPoint]] = {}
+_entry_point_index_fingerprint: Optional[tuple] = None
+_entry_point_index_lock = threading.Lock()
+
+
+def _environment_fingerprint() -> tuple:
+    """
+    Fingerprint of the installed distributions, cheap enough to compute every time a
+    plugin loader is created. Installing or removing a distribution adds or removes
+    files in a directory on sys.path, which changes the modification time of that
+    directory.
+    """
+    fingerprint = []
+    for path in sys.path:
+        try:
+            fingerprint.append((path, os.stat(path or ".").st_mtime_ns))
+        except OSError:
+            fingerprint.append((path, None))
+    return tuple(fingerprint)
+
+
+def _scan_entry_points() -> Dict[str, Dict[str, EntryPoint]]:
+    """Scan all installed distributions for entry points, indexed by group and name."""
+    all_entry_points = entry_points()
+    if isinstance(all_entry_points, dict):  # Python < 3.10
+        all_entry_points = [ep for group in all_entry_points.values() for ep in group]
+    index: Dict[str, Dict[str, EntryPoint]] = {}
+    for entry_point in all_entry_points:
+        index.setdefault(entry_point.group, {})[entry_point.name] = entry_point
+    return index
+
+
+def entry_point_index() -> Dict[str, Dict[str, EntryPoint]]:
+    """
+    Get all installed entry points, indexed by group and name.
+
+    The installed distributions are only scanned the first time, and again when the
+    environment has changed since the last scan, so that all plugin loaders share a
+    single scan.
+    """
+    global _entry_point_index, _entry_point_index_fingerprint
+    fingerprint = _environment_fingerprint()
+    with _entry_point_index_lock:
+        if fingerprint != _entry_point_index_fingerprint:
+            _entry_point_index = _scan_entry_points()
+            _entry_point_index_fingerprint = fingerprint
+        return _entry_point_index
+
+
+def invalidate_entry_point_index() -> None:
+    """Force the next plugin loader to scan the installed distributions again."""
+    global _entry_point_index_fingerprint
+    with _entry_point_index_lock:
+        _entry_point_index_fingerprint = None
+
+
 class PluginLoader:
     # TODO: Refactor into functions
     _page_filter_entry_points: Dict[str, EntryPoint]
     _pipeline_entry_points: Dict[str, EntryPoint]
+    _reader_entry_points: Dict[str, EntryPoint]
 
     def __init__(self):
         """Initalize PluginLoader"""
         PAGE_FILTERS_KEY = "benkpress_plugins.page_filters"
         PIPELINES_KEY = "benkpress_plugins.pipelines"
+        READERS_KEY = "benkpress_plugins.readers"
         self._page_filter_entry_points = dict()
         self._populate_dict(PAGE_FILTERS_KEY, self._page_filter_entry_points)
         self._pipeline_entry_points = dict()
         self._populate_dict(PIPELINES_KEY, self._pipeline_entry_points)
+        self._reader_entry_points = dict()
+        self._populate_dict(READERS_KEY, self._reader_entry_points)
 
     def _populate_dict(self, key: str, dict_: Dict[str, EntryPoint]) -> None:
-        if key in entry_points():
-            for entry_point in entry_points()[key]:
-                dict_[entry_point.name] = entry_point
+        dict_.update(entry_point_index().get(key, {}))
 
     def get_available_page_filters(self) -> List[str]:
         """
@@ -139,6 +205,16 @@ class PluginLoader:
         """
         return [name for name in self._pipeline_entry_points]
 
+    def get_available_readers(self) -> List[str]:
+        """
+        Get the names of all installed readers.
+
+        Returns
+        -------
+        List containing the names of all available reader plugins.
+        """
+        return [name for name in self._reader_entry_points]
+
     def load_page_filter(self, name: str) -> Pipeline:
         """
         Get page_filter entry point.
@@ -166,3 +242,35 @@ class PluginLoader:
         EntryPoint used to load the pipeline plugin.
         """
         return self._pipeline_entry_points[name].load()()
+
+    def get_reader_settings(self, name: str) -> Tuple[str, ...]:
+        """
+        Get the names of the reader settings used by a reader.
+
+        Parameters
+        ----------
+        name : The name of the installed reader.
+
+        Returns
+        -------
+        Tuple containing names of ReaderSettings fields. Readers that do not
+        declare which settings they use are assumed to use all of them.
+        """
+        reader_class = self._reader_entry_points[name].load()
+        all_settings = tuple(field.name for field in fields(ReaderSettings))
+        return getattr(reader_class, "SETTINGS", all_settings)
+
+    def load_reader(self, name: str, settings: ReaderSettings) -> Reader:
+        """
+        Create a reader from its entry point.
+
+        Parameters
+        ----------
+        name : The name of the installed reader.
+        settings : The settings to create the reader from.
+
+        Returns
+        -------
+        Reader created by the reader plugin.
+        """
+        return self._reader_entry_points[name].load().from_settings(settings)
@@ -0,0 +1,147 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Runs every installed reader over the PDF files of a folder and reports pages per
+second, peak resident memory and character agreement with a reference reader.
+Each reader runs in a separate process, so that peak memory is not shared.
+
+Usage: benkpress-bench-readers <folder> [options]
+
+Options:
+    -h --help                   Show this help screen.
+    -v --version                Show version information.
+    --reference=<reader>        Reader to compare the others with [default: Tesseract].
+    --dpi=<dpi>                 Rasterization resolution [default: 100].
+    --language=<lang>           Tesseract language [default: eng].
+    --poppler-path=<path>       Path to the poppler binaries [default: ].
+    --tesseract-path=<path>     Path to the tesseract binary [default: ].
+    --workers=<n>               Number of workers for readers using them [default: 1].
+"""
+
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Optional
+
+from docopt import docopt
+
+from benkpress.api.reader import ReaderSettings
+from benkpress.plugin import PluginLoader
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def _peak_rss_mib() -> Optional[float]:
+    """Peak resident memory of this process and its terminated children in MiB."""
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is reported in bytes on macOS and in kibibytes elsewhere.
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_reader(name: str, settings: ReaderSettings, filepaths: list[Path]) -> dict:
+    """
+    Read all files with the given reader. Intended to run in a fresh process.
+
+    Returns
+    -------
+    Dictionary with the page texts per file, the number of pages, the elapsed
+    time in seconds and the peak resident memory in MiB.
+    """
+    reader = PluginLoader().load_reader(name, settings)
+    texts = {}
+    pages = 0
+    start = time.perf_counter()
+    for filepath in filepaths:
+        texts[filepath] = reader.read(filepath)
+        pages += len(texts[filepath])
+    elapsed = time.perf_counter() - start
+    return {
+        "texts": texts,
+        "pages": pages,
+        "elapsed": elapsed,
+        "peak_rss": _peak_rss_mib(),
+    }
+
+
+def agreement(texts: dict, reference_texts: dict) -> float:
+    """Mean character agreement per file, between 0 and 1."""
+    ratios = [
+        SequenceMatcher(
+            None, " ".join(reference_texts[filepath]), " ".join(pages)
+        ).ratio()
+        for filepath, pages in texts.items()
+    ]
+    return sum(ratios) / len(ratios) if ratios else 1.0
+
+
+def main():
+    """The main entry point of the script."""
+    args = docopt(__doc__)
+    filepaths = sorted(
+        f for f in Path(args["<folder>"]).iterdir() if f.suffix.lower() == ".pdf"
+    )
+    settings = ReaderSettings(
+        dpi=int(args["--dpi"]),
+        language=args["--language"],
+        poppler_path=args["--poppler-path"],
+        tesseract_path=args["--tesseract-path"],
+        workers=int(args["--workers"]),
+    )
+    reference = args["--reference"]
+    names = PluginLoader().get_available_readers()
+    if reference not in names:
+        print(f"Unknown reference reader: {reference}", file=sys.stderr)
+        return 1
+    # The reference goes first, so that the others can be compared with it.
+    names = [reference] + [name for name in names if name != reference]
+    results = {}
+    for name in names:
+        try:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results[name] = executor.submit(
+                    run_reader, name, settings, filepaths
+                ).result()
+        except Exception as e:
+            print(f"{name}: failed ({e!r})")
+            if name == reference:
+                return 1
+            continue
+        result = results[name]
+        peak_rss = result["peak_rss"]
+        print(
+            f"{name}: "
+            f"pages/s={result['pages'] / result['elapsed']:.2f} "
+            f"peak_rss={'n/a' if peak_rss is None else f'{peak_rss:.0f} MiB'} "
+            f"agreement={agreement(result['texts'], results[reference]['texts']):.3f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
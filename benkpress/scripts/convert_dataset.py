@@ -17,19 +17,24 @@
 """
 Converts the old benkpress dataset format to new format.
 
-Usage: benkpress-convert-dataset <src> <dst>
+Usage: benkpress-convert-dataset <src> <dst> [options]
+
+The format of each dataset is given by its extension: .parquet, .feather or .arrow
+for columnar files, and CSV otherwise. Use --keep-ids to convert only the file
+format of a dataset that is already in the new format.
 
 Options:
     -h --help       Show this help screen.
     -v --version    Show version information.
+    --keep-ids      Keep the file ids rather than converting file paths to ids.
 """
 
 import sys
 from pathlib import Path
 
-import pandas as pd
 from docopt import docopt
 
+from benkpress.api.dataset import read_dataset, write_dataset
 from benkpress.api.hash import filename_digest
 
 
@@ -38,9 +43,10 @@ def main():
     args = docopt(__doc__)
     source_dataset_path = Path(args["<src>"])
     destination_dataset_path = Path(args["<dst>"])
-    dataset = pd.read_csv(source_dataset_path, index_col=0)
-    dataset["file"] = dataset["file"].apply(lambda x: filename_digest(Path(x)))
-    dataset.to_csv(destination_dataset_path)
+    dataset = read_dataset(source_dataset_path, index_col=0)
+    if not args["--keep-ids"]:
+        dataset["file"] = dataset["file"].apply(lambda x: filename_digest(Path(x)))
+    write_dataset(dataset, destination_dataset_path)
     return 0
 
 
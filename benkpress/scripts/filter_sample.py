@@ -28,9 +28,10 @@ import sys
 from pathlib import Path
 from shutil import copy
 
-import pandas as pd
 from docopt import docopt
 
+from benkpress.api.dataset import read_dataset
+
 
 def filter_sample(source_folder: Path, target_folder: Path, dataset_path: Path):
     """
@@ -44,7 +45,7 @@ def filter_sample(source_folder: Path, target_folder: Path, dataset_path: Path):
     dataset_path : The dataset to use as blacklist.
     """
     source_filenames = {f.name for f in source_folder.iterdir() if f.is_file()}
-    df = pd.read_csv(dataset_path, index_col=False)
+    df = read_dataset(dataset_path, index_col=False)
     deny_list = {Path(f).name for f in set(df["file"])}
     valid_sources = [source_folder / f for f in source_filenames.difference(deny_list)]
     for source_filepath in valid_sources:
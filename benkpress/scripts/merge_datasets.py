@@ -19,6 +19,10 @@
 """
 Usage: benkpress-merge-datasets <src1> <src2> <dst>
 
+The format of each dataset is given by its extension: .parquet or .feather for
+compressed columnar files, .arrow for uncompressed columnar files that can be
+memory-mapped, and CSV otherwise.
+
 Options:
     -h --help       Show this help screen.
     -v --version    Show version information.
@@ -30,17 +34,19 @@ import sys
 import pandas as pd
 from docopt import docopt
 
+from benkpress.api.dataset import read_dataset, write_dataset
+
 
 def main():
     args = docopt(__doc__)
-    df1 = pd.read_csv(args["<src1>"], index_col=0)
-    df2 = pd.read_csv(args["<src2>"], index_col=0)
+    df1 = read_dataset(args["<src1>"], index_col=0)
+    df2 = read_dataset(args["<src2>"], index_col=0)
     df1_unique_file_ids = set(df1["file"].unique())
     df2_unique_file_ids = set(df2["file"].unique())
     deny_list = df1_unique_file_ids.intersection(df2_unique_file_ids)
     df2 = df2[~df2["file"].isin(deny_list)]
     df = pd.concat([df1, df2])
-    df.to_csv(args["<dst>"])
+    write_dataset(df, args["<dst>"])
     return 0
 
 
@@ -0,0 +1,164 @@
+#! /usr/bin/env python3
+
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Reads, page filters and sentencizes every file of a sample folder across a pool of
+processes, and writes the kept page texts and their sentences to a store. Give
+the store instead of the sample folder when creating a session, and the session
+will not have to wait for any reading. Files already in the store are skipped.
+
+The store is a file that must have the extension .bkstore. It records the absolute
+paths of the files, so that sessions can be started from any working directory.
+
+Usage: benkpress-preprocess <sample_folder> <store> [options]
+
+Options:
+    -h --help                   Show this help screen.
+    -v --version                Show version information.
+    --reader=<name>             Reader plugin [default: Tesseract].
+    --dpi=<dpi>                 Rasterization resolution [default: 100].
+    --language=<lang>           Tesseract language [default: eng].
+    --poppler-path=<path>       Path to the poppler binaries [default: ].
+    --tesseract-path=<path>     Path to the tesseract binary [default: ].
+    --page-filter=<name>        Page filter plugin [default: Passthrough].
+    --spacy-model=<name>        spaCy model for sentences, none if not given.
+    --processes=<n>             Number of worker processes [default: 4].
+"""
+
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+from docopt import docopt
+
+from benkpress.api.reader import ReaderSettings, iter_pages
+from benkpress.api.store import PageTextStore
+from benkpress.api.tokenizer import Sentencizer
+from benkpress.plugin import PluginLoader
+
+logger = logging.getLogger(__name__)
+
+# Per-process state, created once by the pool initializer.
+_reader = None
+_page_filter = None
+_sentencizer = None
+
+
+def _init_worker(
+    reader_name: str,
+    settings: ReaderSettings,
+    page_filter_name: str,
+    spacy_model: Optional[str],
+):
+    global _reader, _page_filter, _sentencizer
+    plugin_loader = PluginLoader()
+    _reader = plugin_loader.load_reader(reader_name, settings)
+    _page_filter = plugin_loader.load_page_filter(page_filter_name)
+    _sentencizer = Sentencizer(spacy_model) if spacy_model else None
+
+
+def preprocess_document(
+    filepath: str,
+) -> tuple[str, list[tuple[int, str]], Optional[list[list[str]]]]:
+    """
+    Read, page filter and sentencize a single file. Runs in a worker process.
+
+    Returns
+    -------
+    The file path, the kept `(page_number, text)` pairs, and the sentences of each
+    kept page, or None if no spaCy model was given.
+    """
+    pages = list(iter_pages(_reader, Path(filepath)))
+    if pages:
+        keep = _page_filter.predict([text for _, text in pages])
+        pages = [page for page, kept in zip(pages, keep) if kept]
+    sentences = None
+    if _sentencizer is not None:
+        sentences = _sentencizer.sentencize_many([text for _, text in pages])
+    return filepath, pages, sentences
+
+
+def _argument_error(args: dict) -> Optional[str]:
+    """Return why the given arguments are invalid, or None if they are valid."""
+    if Path(args["<store>"]).suffix != PageTextStore.SUFFIX:
+        return f"The store must have the extension {PageTextStore.SUFFIX}"
+    plugin_loader = PluginLoader()
+    if args["--reader"] not in plugin_loader.get_available_readers():
+        return f"Unknown reader: {args['--reader']}"
+    if args["--page-filter"] not in plugin_loader.get_available_page_filters():
+        return f"Unknown page filter: {args['--page-filter']}"
+    return None
+
+
+def main():
+    """The main entry point of the script."""
+    logging.basicConfig(level=logging.INFO)
+    args = docopt(__doc__)
+    error = _argument_error(args)
+    if error is not None:
+        print(error, file=sys.stderr)
+        return 1
+    sample_folder = Path(args["<sample_folder>"])
+    store = PageTextStore(Path(args["<store>"]))
+    settings = ReaderSettings(
+        dpi=int(args["--dpi"]),
+        language=args["--language"],
+        poppler_path=args["--poppler-path"],
+        tesseract_path=args["--tesseract-path"],
+    )
+    store.set_meta(
+        {
+            "reader": args["--reader"],
+            "reader_settings": repr(settings),
+            "page_filter": args["--page-filter"],
+            "spacy_model": args["--spacy-model"] or "",
+        }
+    )
+    done = set(store.file_paths())
+    filepaths = [
+        str(f.resolve())
+        for f in sorted(sample_folder.iterdir())
+        if f.is_file() and str(f.resolve()) not in done
+    ]
+    logger.info(f"Preprocessing {len(filepaths)} files, {len(done)} already done")
+    with ProcessPoolExecutor(
+        max_workers=int(args["--processes"]),
+        initializer=_init_worker,
+        initargs=(
+            args["--reader"],
+            settings,
+            args["--page-filter"],
+            args["--spacy-model"],
+        ),
+    ) as executor:
+        futures = {executor.submit(preprocess_document, f): f for f in filepaths}
+        for i, future in enumerate(as_completed(futures), start=1):
+            try:
+                filepath, pages, sentences = future.result()
+            except Exception:
+                logger.exception(f"Failed to preprocess {futures[future]}")
+                continue
+            store.add_document(filepath, pages, sentences)
+            logger.info(f"[{i}/{len(filepaths)}] {filepath}: {len(pages)} pages kept")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Timing instrumentation of the stages of document processing and refitting."""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Span:
+    """Describes a single timed execution of a stage."""
+
+    stage: str
+    start: float
+    duration: float
+    thread_id: int
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values, p between 0 and 100."""
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class SpanRecorder:
+    """Records timing spans of named stages, logs them, passes them on to listeners
+    and keeps the durations of the most recent `window` spans of each stage for a
+    rolling summary. Safe to use from multiple threads."""
+
+    def __init__(self, window: int = 100):
+        self._lock = threading.Lock()
+        self._durations: dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self._listeners: list[Callable[[Span], None]] = []
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        """Call the given function with every recorded span."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as a span of the given stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(
+                Span(stage, start, time.perf_counter() - start, threading.get_ident())
+            )
+
+    def record(self, span: Span) -> None:
+        """Record a finished span."""
+        with self._lock:
+            self._durations[span.stage].append(span.duration)
+            listeners = list(self._listeners)
+        logger.info(f"Timing: {span.stage} took {1000 * span.duration:.1f} ms")
+        for listener in listeners:
+            listener(span)
+
+    def summary(self) -> dict[str, tuple[float, float]]:
+        """The p50 and p95 durations in seconds of the recent spans of each stage."""
+        with self._lock:
+            durations = {k: sorted(v) for k, v in self._durations.items() if v}
+        return {
+            stage: (_percentile(values, 50), _percentile(values, 95))
+            for stage, values in durations.items()
+        }
+
+    def format_summary(self) -> str:
+        """A one-line, human-readable version of the summary."""
+        return " | ".join(
+            f"{stage} p50 {p50:.2f}s p95 {p95:.2f}s"
+            for stage, (p50, p95) in self.summary().items()
+        )
+
+
+class ChromeTracer:
+    """A span listener that collects spans as Chrome trace events, so that a whole
+    session can be inspected in a trace viewer such as chrome://tracing or Perfetto.
+    Every thread that records spans gets its own track."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._events: list[dict] = []
+        self._thread_names: dict[int, str] = {}
+
+    def __call__(self, span: Span) -> None:
+        """Collect a span. Called in the thread that recorded the span."""
+        event = {
+            "name": span.stage,
+            "cat": "benkpress",
+            "ph": "X",
+            "ts": 1e6 * (span.start - self._origin),
+            "dur": 1e6 * span.duration,
+            "pid": os.getpid(),
+            "tid": span.thread_id,
+        }
+        with self._lock:
+            self._events.append(event)
+            self._thread_names.setdefault(
+                span.thread_id, threading.current_thread().name
+            )
+
+    def write(self, path: Path) -> None:
+        """Write the collected spans as a Chrome trace event JSON file."""
+        with self._lock:
+            metadata = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": thread_id,
+                    "args": {"name": name},
+                }
+                for thread_id, name in self._thread_names.items()
+            ]
+            trace = {"traceEvents": metadata + self._events, "displayTimeUnit": "ms"}
+        with open(path, "w") as f:
+            json.dump(trace, f)
@@ -39,6 +39,36 @@ class Ui_MainWindow(object):
         self.dataset_tab.setObjectName("dataset_tab")
         self.verticalLayout_3 = QtWidgets.QVBoxLayout(self.dataset_tab)
         self.verticalLayout_3.setObjectName("verticalLayout_3")
+        self.search_layout = QtWidgets.QHBoxLayout()
+        self.search_layout.setObjectName("search_layout")
+        self.search_line_edit = QtWidgets.QLineEdit(parent=self.dataset_tab)
+        self.search_line_edit.setClearButtonEnabled(True)
+        self.search_line_edit.setObjectName("search_line_edit")
+        self.search_layout.addWidget(self.search_line_edit)
+        self.class_filter_label = QtWidgets.QLabel(parent=self.dataset_tab)
+        self.class_filter_label.setObjectName("class_filter_label")
+        self.search_layout.addWidget(self.class_filter_label)
+        self.class_filter_spin_box = QtWidgets.QSpinBox(parent=self.dataset_tab)
+        self.class_filter_spin_box.setMinimum(-1)
+        self.class_filter_spin_box.setMaximum(99)
+        self.class_filter_spin_box.setProperty("value", -1)
+        self.class_filter_spin_box.setObjectName("class_filter_spin_box")
+        self.search_layout.addWidget(self.class_filter_spin_box)
+        self.proba_filter_label = QtWidgets.QLabel(parent=self.dataset_tab)
+        self.proba_filter_label.setObjectName("proba_filter_label")
+        self.search_layout.addWidget(self.proba_filter_label)
+        self.min_proba_spin_box = QtWidgets.QDoubleSpinBox(parent=self.dataset_tab)
+        self.min_proba_spin_box.setMaximum(1.0)
+        self.min_proba_spin_box.setSingleStep(0.05)
+        self.min_proba_spin_box.setObjectName("min_proba_spin_box")
+        self.search_layout.addWidget(self.min_proba_spin_box)
+        self.max_proba_spin_box = QtWidgets.QDoubleSpinBox(parent=self.dataset_tab)
+        self.max_proba_spin_box.setMaximum(1.0)
+        self.max_proba_spin_box.setSingleStep(0.05)
+        self.max_proba_spin_box.setProperty("value", 1.0)
+        self.max_proba_spin_box.setObjectName("max_proba_spin_box")
+        self.search_layout.addWidget(self.max_proba_spin_box)
+        self.verticalLayout_3.addLayout(self.search_layout)
         self.dataset_table_view = QtWidgets.QTableView(parent=self.dataset_tab)
         self.dataset_table_view.setObjectName("dataset_table_view")
         self.verticalLayout_3.addWidget(self.dataset_table_view)
@@ -60,6 +90,14 @@ class Ui_MainWindow(object):
         self.sample_list_view.setObjectName("sample_list_view")
         self.verticalLayout_2.addWidget(self.sample_list_view)
         self.tabs.addTab(self.sample_tab, "")
+        self.quarantine_tab = QtWidgets.QWidget()
+        self.quarantine_tab.setObjectName("quarantine_tab")
+        self.verticalLayout_5 = QtWidgets.QVBoxLayout(self.quarantine_tab)
+        self.verticalLayout_5.setObjectName("verticalLayout_5")
+        self.quarantine_list_widget = QtWidgets.QListWidget(parent=self.quarantine_tab)
+        self.quarantine_list_widget.setObjectName("quarantine_list_widget")
+        self.verticalLayout_5.addWidget(self.quarantine_list_widget)
+        self.tabs.addTab(self.quarantine_tab, "")
         self.pipeline_tab = QtWidgets.QWidget()
         self.pipeline_tab.setObjectName("pipeline_tab")
         self.verticalLayout_4 = QtWidgets.QVBoxLayout(self.pipeline_tab)
@@ -139,10 +177,15 @@ class Ui_MainWindow(object):
     def retranslateUi(self, MainWindow):
         _translate = QtCore.QCoreApplication.translate
         MainWindow.setWindowTitle(_translate("MainWindow", "benkpress2"))
+        self.search_line_edit.setPlaceholderText(_translate("MainWindow", "Search texts"))
+        self.class_filter_label.setText(_translate("MainWindow", "Class:"))
+        self.class_filter_spin_box.setSpecialValueText(_translate("MainWindow", "Any"))
+        self.proba_filter_label.setText(_translate("MainWindow", "Proba:"))
         self.dataset_size_descript_label.setText(_translate("MainWindow", "Dataset size:"))
         self.dataset_size_label.setText(_translate("MainWindow", "0"))
         self.tabs.setTabText(self.tabs.indexOf(self.dataset_tab), _translate("MainWindow", "Dataset"))
         self.tabs.setTabText(self.tabs.indexOf(self.sample_tab), _translate("MainWindow", "Sample"))
+        self.tabs.setTabText(self.tabs.indexOf(self.quarantine_tab), _translate("MainWindow", "Quarantine"))
         self.kfold_label.setText(_translate("MainWindow", "K-fold splits"))
         self.refit_pipeline_button.setText(_translate("MainWindow", "Refit pipeline"))
         self.tabs.setTabText(self.tabs.indexOf(self.pipeline_tab), _translate("MainWindow", "Pipeline"))
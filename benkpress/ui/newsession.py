@@ -26,6 +26,7 @@ class Ui_NewSessionDialog(object):
         self.formLayout.setWidget(0, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label)
         self.sample_folder_path_line_edit = PathEdit(parent=self.general_settings_group)
         self.sample_folder_path_line_edit.setProperty("folder", True)
+        self.sample_folder_path_line_edit.setProperty("file_filter", "benkpress stores (*.bkstore)")
         self.sample_folder_path_line_edit.setObjectName("sample_folder_path_line_edit")
         self.formLayout.setWidget(0, QtWidgets.QFormLayout.ItemRole.FieldRole, self.sample_folder_path_line_edit)
         self.label_2 = QtWidgets.QLabel(parent=self.general_settings_group)
@@ -68,6 +69,45 @@ class Ui_NewSessionDialog(object):
         self.spacy_model_combo_box = SpacyModelsBox(parent=self.general_settings_group)
         self.spacy_model_combo_box.setObjectName("spacy_model_combo_box")
         self.formLayout.setWidget(4, QtWidgets.QFormLayout.ItemRole.FieldRole, self.spacy_model_combo_box)
+        self.label_14 = QtWidgets.QLabel(parent=self.general_settings_group)
+        self.label_14.setObjectName("label_14")
+        self.formLayout.setWidget(5, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label_14)
+        self.prefetch_depth_spin_box = QtWidgets.QSpinBox(parent=self.general_settings_group)
+        self.prefetch_depth_spin_box.setMinimum(1)
+        self.prefetch_depth_spin_box.setMaximum(16)
+        self.prefetch_depth_spin_box.setProperty("value", 1)
+        self.prefetch_depth_spin_box.setObjectName("prefetch_depth_spin_box")
+        self.formLayout.setWidget(5, QtWidgets.QFormLayout.ItemRole.FieldRole, self.prefetch_depth_spin_box)
+        self.label_15 = QtWidgets.QLabel(parent=self.general_settings_group)
+        self.label_15.setObjectName("label_15")
+        self.formLayout.setWidget(6, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label_15)
+        self.trace_check_box = QtWidgets.QCheckBox(parent=self.general_settings_group)
+        self.trace_check_box.setObjectName("trace_check_box")
+        self.formLayout.setWidget(6, QtWidgets.QFormLayout.ItemRole.FieldRole, self.trace_check_box)
+        self.label_16 = QtWidgets.QLabel(parent=self.general_settings_group)
+        self.label_16.setObjectName("label_16")
+        self.formLayout.setWidget(7, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label_16)
+        self.document_timeout_spin_box = QtWidgets.QSpinBox(parent=self.general_settings_group)
+        self.document_timeout_spin_box.setMinimum(0)
+        self.document_timeout_spin_box.setMaximum(3600)
+        self.document_timeout_spin_box.setSingleStep(10)
+        self.document_timeout_spin_box.setObjectName("document_timeout_spin_box")
+        self.formLayout.setWidget(7, QtWidgets.QFormLayout.ItemRole.FieldRole, self.document_timeout_spin_box)
+        self.label_17 = QtWidgets.QLabel(parent=self.general_settings_group)
+        self.label_17.setObjectName("label_17")
+        self.formLayout.setWidget(8, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label_17)
+        self.max_pages_spin_box = QtWidgets.QSpinBox(parent=self.general_settings_group)
+        self.max_pages_spin_box.setMinimum(0)
+        self.max_pages_spin_box.setMaximum(100000)
+        self.max_pages_spin_box.setSingleStep(100)
+        self.max_pages_spin_box.setObjectName("max_pages_spin_box")
+        self.formLayout.setWidget(8, QtWidgets.QFormLayout.ItemRole.FieldRole, self.max_pages_spin_box)
+        self.label_18 = QtWidgets.QLabel(parent=self.general_settings_group)
+        self.label_18.setObjectName("label_18")
+        self.formLayout.setWidget(9, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label_18)
+        self.dataset_path_line_edit = PathEdit(parent=self.general_settings_group)
+        self.dataset_path_line_edit.setObjectName("dataset_path_line_edit")
+        self.formLayout.setWidget(9, QtWidgets.QFormLayout.ItemRole.FieldRole, self.dataset_path_line_edit)
         self.verticalLayout_2.addLayout(self.formLayout)
         self.verticalLayout.addWidget(self.general_settings_group)
         self.reader_settings_group = QtWidgets.QGroupBox(parent=NewSessionDialog)
@@ -111,6 +151,34 @@ class Ui_NewSessionDialog(object):
         self.tesseract_language_line_edit = QtWidgets.QLineEdit(parent=self.reader_settings_group)
         self.tesseract_language_line_edit.setObjectName("tesseract_language_line_edit")
         self.formLayout_2.setWidget(2, QtWidgets.QFormLayout.ItemRole.FieldRole, self.tesseract_language_line_edit)
+        self.label_11 = QtWidgets.QLabel(parent=self.reader_settings_group)
+        self.label_11.setObjectName("label_11")
+        self.formLayout_2.setWidget(5, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label_11)
+        self.ocr_workers_spin_box = QtWidgets.QSpinBox(parent=self.reader_settings_group)
+        self.ocr_workers_spin_box.setMinimum(1)
+        self.ocr_workers_spin_box.setMaximum(64)
+        self.ocr_workers_spin_box.setProperty("value", 1)
+        self.ocr_workers_spin_box.setObjectName("ocr_workers_spin_box")
+        self.formLayout_2.setWidget(5, QtWidgets.QFormLayout.ItemRole.FieldRole, self.ocr_workers_spin_box)
+        self.label_12 = QtWidgets.QLabel(parent=self.reader_settings_group)
+        self.label_12.setObjectName("label_12")
+        self.formLayout_2.setWidget(6, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label_12)
+        self.rescan_dpi_spin_box = QtWidgets.QSpinBox(parent=self.reader_settings_group)
+        self.rescan_dpi_spin_box.setMinimum(0)
+        self.rescan_dpi_spin_box.setMaximum(600)
+        self.rescan_dpi_spin_box.setSingleStep(10)
+        self.rescan_dpi_spin_box.setProperty("value", 0)
+        self.rescan_dpi_spin_box.setObjectName("rescan_dpi_spin_box")
+        self.formLayout_2.setWidget(6, QtWidgets.QFormLayout.ItemRole.FieldRole, self.rescan_dpi_spin_box)
+        self.label_13 = QtWidgets.QLabel(parent=self.reader_settings_group)
+        self.label_13.setObjectName("label_13")
+        self.formLayout_2.setWidget(7, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label_13)
+        self.min_confidence_spin_box = QtWidgets.QSpinBox(parent=self.reader_settings_group)
+        self.min_confidence_spin_box.setMinimum(0)
+        self.min_confidence_spin_box.setMaximum(100)
+        self.min_confidence_spin_box.setProperty("value", 60)
+        self.min_confidence_spin_box.setObjectName("min_confidence_spin_box")
+        self.formLayout_2.setWidget(7, QtWidgets.QFormLayout.ItemRole.FieldRole, self.min_confidence_spin_box)
         self.verticalLayout_3.addLayout(self.formLayout_2)
         self.verticalLayout.addWidget(self.reader_settings_group)
         self.dialog_button_box = QtWidgets.QDialogButtonBox(parent=NewSessionDialog)
@@ -134,6 +202,16 @@ class Ui_NewSessionDialog(object):
         self.page_target_radio_button.setText(_translate("NewSessionDialog", "Page"))
         self.sentence_target_radio_button.setText(_translate("NewSessionDialog", "Sentence"))
         self.label_7.setText(_translate("NewSessionDialog", "Spacy model"))
+        self.label_14.setText(_translate("NewSessionDialog", "Look-ahead depth"))
+        self.label_15.setText(_translate("NewSessionDialog", "Trace"))
+        self.trace_check_box.setText(_translate("NewSessionDialog", "Record a trace when saving"))
+        self.label_16.setText(_translate("NewSessionDialog", "Time limit per document"))
+        self.document_timeout_spin_box.setSpecialValueText(_translate("NewSessionDialog", "Off"))
+        self.document_timeout_spin_box.setSuffix(_translate("NewSessionDialog", " s"))
+        self.label_17.setText(_translate("NewSessionDialog", "Page limit per document"))
+        self.max_pages_spin_box.setSpecialValueText(_translate("NewSessionDialog", "Off"))
+        self.label_18.setText(_translate("NewSessionDialog", "Continue dataset"))
+        self.dataset_path_line_edit.setPlaceholderText(_translate("NewSessionDialog", "New dataset"))
         self.reader_settings_group.setTitle(_translate("NewSessionDialog", "PDF Reader Settings"))
         self.label_4.setText(_translate("NewSessionDialog", "Reader"))
         self.label_5.setText(_translate("NewSessionDialog", "DPI"))
@@ -141,4 +219,8 @@ class Ui_NewSessionDialog(object):
         self.label_9.setText(_translate("NewSessionDialog", "Poppler path"))
         self.label_10.setText(_translate("NewSessionDialog", "Tesseract path"))
         self.tesseract_language_line_edit.setText(_translate("NewSessionDialog", "eng"))
+        self.label_11.setText(_translate("NewSessionDialog", "OCR workers"))
+        self.label_12.setText(_translate("NewSessionDialog", "Re-scan DPI"))
+        self.rescan_dpi_spin_box.setSpecialValueText(_translate("NewSessionDialog", "Off"))
+        self.label_13.setText(_translate("NewSessionDialog", "Min. confidence"))
 from benkpress.widget import PageFilterBox, PathEdit, PipelineBox, ReaderBox, SpacyModelsBox
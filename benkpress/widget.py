@@ -61,34 +61,61 @@ class SpacyModelsBox(qtw.QComboBox):
 
 
 class ReaderBox(qtw.QComboBox):
-    """ "A combobox for selecting PDF reader."""
+    """A combobox for selecting a PDF reader plugin."""
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.addItems(["Tesseract", "PyPDF"])
+        self._plugin_loader = PluginLoader()
+        self.addItems(self._plugin_loader.get_available_readers())
 
 
 class PathEdit(qtw.QLineEdit):
-    """A path edit widget that allows the user to select a path using a file dialog."""
+    """A path edit widget that allows the user to select a path using a file dialog.
+
+    With the "folder" property set, the dialog selects a directory, and with the
+    "file_filter" property set as well, a second button selects a file matching
+    that filter instead."""
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._file_action = None
         self._init_actions()
 
     def _init_actions(self):
         """Initialize actions."""
-        action = qtg.QAction(
-            self.style().standardIcon(qtw.QStyle.StandardPixmap.SP_DirIcon), "", self
-        )
+        self._add_action(qtw.QStyle.StandardPixmap.SP_DirIcon, self._open_dialog)
+
+    def _add_action(self, pixmap: qtw.QStyle.StandardPixmap, slot) -> qtg.QAction:
+        action = qtg.QAction(self.style().standardIcon(pixmap), "", self)
         self.addAction(action, qtw.QLineEdit.ActionPosition.TrailingPosition)
-        action.triggered.connect(self._open_dialog)
+        action.triggered.connect(slot)
+        return action
+
+    def event(self, event: qtc.QEvent) -> bool:
+        # Properties are set after construction, e.g. by setupUi.
+        if (
+            event.type() == qtc.QEvent.Type.DynamicPropertyChange
+            and bytes(event.propertyName()) == b"file_filter"
+            and self._file_action is None
+        ):
+            self._file_action = self._add_action(
+                qtw.QStyle.StandardPixmap.SP_FileIcon, self._open_file_dialog
+            )
+        return super().event(event)
 
     def _open_dialog(self):
         """Open the file dialog."""
         if self.property("folder"):
             path = qtw.QFileDialog.getExistingDirectory(self, "Select directory")
+            if path:
+                self.setText(path)
         else:
-            path = qtw.QFileDialog.getOpenFileName(self, "Select file")[0]
+            self._open_file_dialog()
+
+    def _open_file_dialog(self):
+        path = qtw.QFileDialog.getOpenFileName(
+            self, "Select file", "", self.property("file_filter") or ""
+        )[0]
         if path:
             self.setText(path)
 
@@ -27,12 +27,15 @@ setup(
     packages=find_packages(),
     package_data={"benkpress.resources": ["*.pdf"]},
     install_requires=get_requirements(),
+    extras_require={"tesserocr": ["tesserocr"], "columnar": ["pyarrow"]},
     entry_points={
         "console_scripts": [
             "benkpress=benkpress.application:main",
             "benkpress-filter-sample=benkpress.scripts.filter_sample:main",
             "benkpress-merge-datasets=benkpress.scripts.merge_datasets:main",
             "benkpress-convert-dataset=benkpress.scripts.convert_dataset:main",
+            "benkpress-bench-readers=benkpress.scripts.bench_readers:main",
+            "benkpress-preprocess=benkpress.scripts.preprocess:main",
         ],
         "benkpress_plugins.page_filters": [
             "Passthrough=benkpress.plugin:PassthroughPageClassifier",
@@ -42,5 +45,11 @@ setup(
             "TfidfXgboost=benkpress.plugin:tfidf_xgb_pipeline",
             "TfidfSvSmoteXgboost=benkpress.plugin:tfidf_sv_smote_xgb_pipeline",
         ],
+        "benkpress_plugins.readers": [
+            "Tesseract=benkpress.api.reader:TesseractReader",
+            "Tesserocr=benkpress.api.reader:TesserocrReader",
+            "Hybrid=benkpress.api.reader:HybridReader",
+            "PyPDF=benkpress.api.reader:PyPDFReader",
+        ],
     },
 )
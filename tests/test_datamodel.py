@@ -0,0 +1,208 @@
+# benkpress
+# Copyright (C) 2022-2023 Dennis Hedback
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import time
+
+import pytest
+from PyQt6 import QtCore as qtc
+
+from benkpress.api.dataset import read_dataset
+from benkpress.api.journal import DatasetJournal
+from benkpress.datamodel import DataframeTableModel, DatasetFilterProxyModel
+
+Row = DataframeTableModel.RowConfig
+
+
+@pytest.fixture(scope="module", autouse=True)
+def application():
+    return qtc.QCoreApplication.instance() or qtc.QCoreApplication([])
+
+
+@pytest.fixture
+def dataset():
+    model = DataframeTableModel()
+    model.appendRows(
+        [
+            Row("a", 0, "The quick brown fox", 0.9, 1),
+            Row("a", 1, "jumps over the lazy dog", 0.2, 0),
+            Row("b", 0, "The lazy fox sleeps", 0.6, 1),
+        ]
+    )
+    return model
+
+
+@pytest.fixture
+def proxy(dataset):
+    proxy = DatasetFilterProxyModel()
+    proxy.setSourceModel(dataset)
+    return proxy
+
+
+def source_rows(proxy):
+    return [
+        proxy.mapToSource(proxy.index(row, 0)).row() for row in range(proxy.rowCount())
+    ]
+
+
+def filter_and_wait(proxy, *args, **kwargs):
+    proxy.set_filter(*args, **kwargs)
+    deadline = time.monotonic() + 10
+    while proxy.is_indexing() and time.monotonic() < deadline:
+        qtc.QCoreApplication.processEvents()
+    assert not proxy.is_indexing()
+
+
+def test_shows_all_rows_unfiltered(proxy):
+    assert source_rows(proxy) == [0, 1, 2]
+    assert not proxy.is_filtered()
+
+
+def test_filters_by_terms_class_and_proba(proxy):
+    filter_and_wait(proxy, "LAZY")
+    assert source_rows(proxy) == [1, 2]
+    filter_and_wait(proxy, "lazy fox")
+    assert source_rows(proxy) == [2]
+    filter_and_wait(proxy, "fox", class_=1, min_proba=0.7)
+    assert source_rows(proxy) == [0]
+    filter_and_wait(proxy, "cat")
+    assert source_rows(proxy) == []
+    assert proxy.is_filtered()
+
+
+def test_filters_appended_rows(dataset, proxy):
+    filter_and_wait(proxy, "fox")
+    dataset.appendRows([Row("c", 0, "No animals here", 0.5, 0)])
+    dataset.appendRow(Row("c", 1, "A fox again", 0.5, 0))
+    assert source_rows(proxy) == [0, 2, 4]
+
+
+def test_forwards_changed_data(dataset, proxy):
+    filter_and_wait(proxy, "lazy")
+    changed = []
+    proxy.dataChanged.connect(lambda first, last, roles: changed.append(first.row()))
+    class_column = dataset.columnCount() - 1
+    dataset.setData(dataset.index(2, class_column), 0)
+    dataset.setData(dataset.index(0, class_column), 0)
+    assert changed == [1]
+
+
+def test_maps_from_source(dataset, proxy):
+    filter_and_wait(proxy, "lazy")
+    assert proxy.mapFromSource(dataset.index(2, 0)).row() == 1
+    assert not proxy.mapFromSource(dataset.index(0, 0)).isValid()
+
+
+def test_builds_index_in_the_background(dataset, proxy):
+    progress = []
+    proxy.indexing_progressed.connect(lambda *args: progress.append(args))
+    proxy.set_filter("fox")
+    assert proxy.is_indexing()
+    assert source_rows(proxy) == [0, 1, 2]
+    dataset.appendRow(Row("c", 0, "The last fox", 0.5, 0))
+    filter_and_wait(proxy, "fox")
+    assert source_rows(proxy) == [0, 2, 3]
+    assert progress[-1] == (4, 4)
+
+
+def test_missing_proba_has_default_colour():
+    model = DataframeTableModel()
+    model.appendRows([Row("a", 0, "Some text", 0.5, 0)])
+    model.appendRows([Row("b", 0, "More text", None, 0)])
+    proba_column = list(model.dataframe().columns).index("proba")
+    foreground = qtc.Qt.ItemDataRole.ForegroundRole
+    assert model.data(model.index(0, proba_column), foreground) is not None
+    assert model.data(model.index(1, proba_column), foreground) is None
+
+
+def test_indexes_lazily_loaded_texts_without_loading_them(tmp_path):
+    path = tmp_path / "dataset.arrow"
+    model = DataframeTableModel()
+    model.appendRows(
+        [
+            Row("a", i, f"text {i} {'fox' if i % 3 == 0 else 'dog'}", 0.5, 0)
+            for i in range(50)
+        ]
+    )
+    model.save(path)
+    lazy = DataframeTableModel.load(path, lazy=True)
+    lazy.appendRow(Row("b", 0, "A last fox", 0.5, 0))
+    proxy = DatasetFilterProxyModel()
+    proxy.setSourceModel(lazy)
+    filter_and_wait(proxy, "fox")
+    assert source_rows(proxy) == list(range(0, 50, 3)) + [50]
+    lazy.appendRow(Row("b", 1, "Another fox", 0.5, 0))
+    assert source_rows(proxy)[-1] == 51
+    assert lazy._lazy_columns is not None
+
+
+def wait_for_compaction(model):
+    deadline = time.monotonic() + 10
+    while model._compacting and time.monotonic() < deadline:
+        qtc.QCoreApplication.processEvents()
+    assert not model._compacting
+
+
+def test_recovers_from_journal_compacted_in_the_background(tmp_path):
+    journal = DatasetJournal(tmp_path, compact_every=3)
+    model = DataframeTableModel()
+    model.set_journal(journal)
+    class_column = 4
+    for i in range(3):
+        model.appendRow(Row("a", i, f"text {i}", 0.5, 0))
+    assert model._compacting
+    model.appendRow(Row("b", 0, "recorded while compacting", 0.5, 0))
+    model.setData(model.index(1, class_column), 1)
+    wait_for_compaction(model)
+    assert len(list(tmp_path.glob(DatasetJournal.SNAPSHOT_PATTERN))) == 1
+    model.setData(model.index(3, class_column), 1)
+    recovered = DataframeTableModel.recover(journal)
+    assert recovered.dataframe().equals(model.dataframe())
+    journal.discard()
+
+
+def test_saves_twice_to_the_same_csv(tmp_path):
+    path = tmp_path / "dataset.csv"
+    model = DataframeTableModel()
+    model.appendRows([Row("a", 0, "first", 0.5, 0), Row("a", 1, "second", 0.5, 1)])
+    model.save(path)
+    model.appendRow(Row("b", 0, "third", 0.5, 0))
+    model.save(path)
+    saved = read_dataset(path, index_col=0)
+    assert saved["text"].tolist() == ["first", "second", "third"]
+    assert saved.index.tolist() == [0, 1, 2]
+    model.setData(model.index(0, 4), 1)
+    model.appendRow(Row("b", 1, "fourth", 0.5, 0))
+    model.save(path)
+    saved = read_dataset(path, index_col=0)
+    assert saved["class"].tolist() == [1, 1, 0, 0]
+    assert len(saved) == 4
+
+
+def test_compacts_lazily_loaded_dataset_without_loading_texts(tmp_path):
+    path = tmp_path / "dataset.arrow"
+    model = DataframeTableModel()
+    model.appendRows([Row("a", i, f"text {i}", 0.5, 0) for i in range(50)])
+    model.save(path)
+    lazy = DataframeTableModel.load(path, lazy=True)
+    journal = DatasetJournal(tmp_path / "journal", compact_every=2)
+    lazy.set_journal(journal)
+    lazy.appendRows([Row("b", 0, "text 50", 0.5, 0), Row("b", 1, "text 51", 0.5, 1)])
+    lazy.appendRow(Row("b", 2, "text 52", 0.5, 0))
+    wait_for_compaction(lazy)
+    assert lazy._lazy_columns is not None
+    recovered = DataframeTableModel.recover(journal)
+    assert recovered.texts().tolist() == [f"text {i}" for i in range(53)]
+    journal.discard()